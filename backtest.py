@@ -0,0 +1,281 @@
+"""
+Vectorized daily backtest of the trading algorithm.
+
+Every date's signal comes from one CompiledTree.evaluate_many() pass over the
+historical indicator matrix, each signal is turned into target weights, and
+the equity curve, turnover and drawdowns follow from array arithmetic, so
+years of history take well under a second once the bars are loaded.
+
+A signal computed from the close of day t is held from that close to the
+close of day t+1 (no look-ahead).
+
+Usage:
+    python3 backtest.py --years 5 --cost-bps 5
+"""
+
+import argparse
+import os
+import re
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from data_provider import get_provider
+from indicators import feature_history
+from price_cache import IS_LAMBDA, load_bars, save_bars
+from price_matrix import PriceMatrix
+import main
+
+TRADING_DAYS = 252
+
+# Long backtest histories are kept apart from main.py's price cache, which
+# trims every file to the live run's short lookback
+HISTORY_CACHE_DIR = os.environ.get('BACKTEST_CACHE_DIR',
+                                   '/tmp/backtest_cache' if IS_LAMBDA else '.backtest_cache')
+
+_TICKER = re.compile(r'^[A-Z]{1,5}$')
+_WEIGHT = re.compile(r'^([A-Z]{1,5})\s*=\s*([0-9.]+)$')
+_BUY = re.compile(r'^Buy ((?:[A-Z]{1,5}, )*[A-Z]{1,5}(?: and [A-Z]{1,5})?) \(')
+
+
+def parse_allocation(signal):
+    """
+    Turn a signal string from execute_logic() into target weights.
+
+    "VIX Blend (VXX=0.45, VIXM=0.2, UVIX=0.35)" -> explicit weights
+    "1.5x VIX Group (VXX, UVIX)"                -> equal weights
+    "Buy TQQQ and TECL (Bottom 2 RSIs: ...)"    -> equal weights (rank node result)
+    "BIL (T-Bill ETF)", "LABD"                  -> 100% in that ticker
+
+    Returns: dict of ticker -> weight
+    Raises: ValueError if the string names no tradable ticker
+    """
+    buy = _BUY.match(signal)
+    if buy:
+        names = re.split(r', | and ', buy.group(1))
+        return {name: 1.0 / len(names) for name in names}
+
+    inner = re.search(r'\(([^)]*)\)', signal)
+    if inner:
+        parts = [part.strip() for part in inner.group(1).split(',')]
+        weights = [_WEIGHT.match(part) for part in parts]
+        if all(weights):
+            return {m.group(1): float(m.group(2)) for m in weights}
+        if all(_TICKER.match(part) for part in parts):
+            return {part: 1.0 / len(parts) for part in parts}
+
+    # A bare ticker, optionally followed by a description: "BIL (T-Bill ETF)"
+    head = signal.split()[0]
+    if _TICKER.match(head):
+        return {head: 1.0}
+    raise ValueError(f"Cannot parse an allocation from signal: {signal}")
+
+
+def load_history(tickers, start_date, end_date, provider=None):
+    """
+    Daily bars for the backtest: cached bars when they already reach back
+    to start_date and were synced today, otherwise one grouped fetch. Settled bars (before today)
+    are saved to HISTORY_CACHE_DIR when the provider is cacheable.
+    Returns: PriceMatrix
+    """
+    if provider is None:
+        provider = get_provider()
+
+    today = main._today_et()
+    frames = {}
+    missing = []
+    for ticker in tickers:
+        cached = load_bars(ticker, HISTORY_CACHE_DIR) if provider.cacheable else None
+        if cached is not None and cached.attrs['synced_on'] == today.strftime('%Y-%m-%d') \
+                and cached.index[0] <= pd.Timestamp(start_date) + timedelta(days=7):
+            frames[ticker] = cached
+        else:
+            missing.append(ticker)
+
+    if missing:
+        print(f"⬇️  Fetching {len(missing)} tickers: {', '.join(missing)}")
+        fetched = provider.fetch_batch(missing, start_date, end_date, main.REQUEST_TIMEOUT)
+        for ticker in missing:
+            df = fetched.get(ticker, pd.DataFrame())
+            if df.empty:
+                print(f"⚠️  No history for {ticker}")
+                continue
+            frames[ticker] = df
+            if provider.cacheable:
+                save_bars(ticker, df[df.index < today], today.strftime('%Y-%m-%d'),
+                          cache_dir=HISTORY_CACHE_DIR)
+
+    return PriceMatrix.from_frames(frames)
+
+
+def _allocation_matrix(tree, assets):
+    """Weights of every static leaf (rank leaves stay zero): array of shape (leaves, assets)."""
+    column = {ticker: i for i, ticker in enumerate(assets)}
+    weights = np.zeros((len(tree.leaves), len(assets)))
+    for leaf, signal in enumerate(tree.leaves):
+        if leaf in tree.ranks:
+            continue
+        for ticker, weight in parse_allocation(signal).items():
+            weights[leaf, column[ticker]] = weight
+    return weights
+
+
+def run_backtest(matrix, tree=None, start_date=None, cost_bps=0.0, feature_matrix=None):
+    """
+    Backtest the decision tree over the dates of a PriceMatrix.
+
+    Args:
+        matrix: PriceMatrix with every ticker the tree reads or trades
+        tree: CompiledTree (default: main.COMPILED_TREE)
+        start_date: first date allowed to hold a position (default: as soon
+                    as every indicator has enough history)
+        cost_bps: one-way trading cost charged on every unit of notional
+                  bought or sold, in basis points
+        feature_matrix: function(features) -> (dates x features) history,
+                        e.g. columns of a precomputed matrix (default:
+                        feature_history() on `matrix`)
+
+    Returns: dict with
+        dates, assets, signals (leaf label per date), weights (dates x assets),
+        returns, equity, drawdown, turnover (per-date arrays) and metrics
+    """
+    if tree is None:
+        tree = main.COMPILED_TREE
+    if feature_matrix is None:
+        feature_matrix = lambda requirements: feature_history(matrix, requirements)
+    features = feature_matrix(tree.features)
+
+    leaf, _ = tree.evaluate_many(features)
+
+    # Only trade once every indicator the tree reads exists
+    active = ~np.isnan(features).any(axis=1)
+    if start_date is not None:
+        active &= matrix.dates >= np.datetime64(start_date, 'D')
+
+    static = {leaf_idx: parse_allocation(signal) for leaf_idx, signal in enumerate(tree.leaves)
+              if leaf_idx not in tree.ranks}
+    assets = sorted({ticker for allocation in static.values() for ticker in allocation}
+                    | {ticker for spec in tree.ranks.values() for ticker in spec['tickers']})
+    missing = [ticker for ticker in assets if ticker not in matrix]
+    if missing:
+        raise ValueError(f"No price history for traded tickers: {', '.join(missing)}")
+
+    weights = _allocation_matrix(tree, assets)[np.maximum(leaf, 0)]
+    signals = np.array(tree.leaves, dtype=object)[np.maximum(leaf, 0)]
+
+    for rank_leaf, spec in tree.ranks.items():
+        # Rank nodes pick for every date they are reached at once; ties go
+        # to the earlier ticker, like main.execute_rank()
+        rows = np.flatnonzero(active & (leaf == rank_leaf))
+        if not len(rows):
+            continue
+        picks = tree.rank_many(rank_leaf, np.nan_to_num(features[rows], nan=0.0))
+        columns = np.array([assets.index(t) for t in spec['tickers']])
+        for pick in range(picks.shape[1]):
+            weights[rows, columns[picks[:, pick]]] = 1.0 / picks.shape[1]
+        names = np.array(spec['tickers'], dtype=object)[picks]
+        signals[rows] = [f"Buy {', '.join(row[:-1])} and {row[-1]}" if len(row) > 1 else f"Buy {row[0]}"
+                         for row in names]
+
+    weights[~active] = 0.0
+    signals[~active] = None
+
+    # Close-to-close asset returns; a missing close earns nothing that day
+    closes = matrix.closes[[matrix.index[t] for t in assets]].T
+    with np.errstate(invalid='ignore', divide='ignore'):
+        asset_returns = np.nan_to_num(closes[1:] / closes[:-1] - 1, nan=0.0)
+
+    # Weights set at close t earn the return from t to t+1
+    # Every unit of notional bought or sold pays the one-way cost; turnover
+    # (reported) counts a full switch from A to B once
+    traded = np.abs(np.diff(weights, axis=0, prepend=0.0)).sum(axis=1)
+    turnover = traded / 2
+    returns = np.zeros(len(matrix.dates))
+    returns[1:] = (weights[:-1] * asset_returns).sum(axis=1)
+    returns -= traded * cost_bps / 10000
+
+    equity = np.cumprod(1 + returns)
+    drawdown = equity / np.maximum.accumulate(equity) - 1
+
+    result = {
+        'dates': matrix.dates,
+        'assets': assets,
+        'signals': signals,
+        'weights': weights,
+        'returns': returns,
+        'equity': equity,
+        'drawdown': drawdown,
+        'turnover': turnover,
+    }
+    result['metrics'] = backtest_metrics(result, active)
+    return result
+
+
+def backtest_metrics(result, active=None):
+    """Summary statistics of a run_backtest() result over its active dates."""
+    returns = result['returns']
+    first = int(np.argmax(active)) if active is not None and active.any() else 0
+    returns = returns[first:]
+    equity = np.cumprod(1 + returns)
+    years = len(returns) / TRADING_DAYS
+
+    volatility = returns.std() * np.sqrt(TRADING_DAYS)
+    signals = result['signals'][first:]
+    return {
+        'start': str(result['dates'][first]),
+        'end': str(result['dates'][-1]),
+        'days': len(returns),
+        'total_return': equity[-1] - 1 if len(equity) else 0.0,
+        'cagr': equity[-1] ** (1 / years) - 1 if years > 0 else 0.0,
+        'volatility': volatility,
+        'sharpe': returns.mean() * TRADING_DAYS / volatility if volatility > 0 else 0.0,
+        'max_drawdown': (equity / np.maximum.accumulate(equity) - 1).min() if len(equity) else 0.0,
+        'annual_turnover': result['turnover'][first:].sum() / years if years > 0 else 0.0,
+        'signal_changes': int((signals[1:] != signals[:-1]).sum()),
+    }
+
+
+def print_report(result):
+    """Print the metrics and the time spent in each signal."""
+    metrics = result['metrics']
+    print("\n" + "="*80)
+    print(f"BACKTEST: {metrics['start']} → {metrics['end']} ({metrics['days']} trading days)")
+    print("="*80 + "\n")
+    print(f"Total Return:      {metrics['total_return']*100:8.2f}%")
+    print(f"CAGR:              {metrics['cagr']*100:8.2f}%")
+    print(f"Volatility:        {metrics['volatility']*100:8.2f}%")
+    print(f"Sharpe:            {metrics['sharpe']:8.2f}")
+    print(f"Max Drawdown:      {metrics['max_drawdown']*100:8.2f}%")
+    print(f"Annual Turnover:   {metrics['annual_turnover']*100:8.0f}%")
+    print(f"Signal Changes:    {metrics['signal_changes']:8d}")
+
+    signals = pd.Series(result['signals']).dropna()
+    print("\n📊 Time in each signal:")
+    for signal, share in signals.value_counts(normalize=True).items():
+        print(f"  {share*100:5.1f}%  {signal}")
+    print("\n" + "="*80 + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest the trading algorithm's decision tree")
+    parser.add_argument('--years', type=float, default=5, help="years of history to test")
+    parser.add_argument('--cost-bps', type=float, default=0.0, help="one-way trading cost in basis points")
+    args = parser.parse_args()
+
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=int(args.years * 365))
+    warmup = main.lookback_days(max(main.required_rows().values()))
+
+    traded = {t for leaf, signal in enumerate(main.COMPILED_TREE.leaves)
+              if leaf not in main.COMPILED_TREE.ranks for t in parse_allocation(signal)}
+    tickers = sorted(set(main.required_rows()) | traded)
+    matrix = load_history(tickers, start_date - timedelta(days=warmup), end_date)
+
+    started = time.perf_counter()
+    result = run_backtest(matrix, start_date=start_date, cost_bps=args.cost_bps)
+    elapsed = time.perf_counter() - started
+
+    print_report(result)
+    print(f"⏱️  Backtest computed in {elapsed*1000:.0f} ms")
@@ -0,0 +1,204 @@
+"""
+Market data providers for the trading algorithm.
+main.py only talks to a MarketDataProvider, so the pipeline can run against
+live Yahoo Finance data or against bars recorded on disk (no network).
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+class MarketDataProvider:
+    """
+    Interface for daily bar sources.
+
+    Both methods return DataFrames indexed by naive dates with (a subset of)
+    OHLCV_COLUMNS; an empty DataFrame means no data for that ticker.
+    """
+
+    # Whether fetched bars may go into the price caches (on-disk and shared)
+    cacheable = True
+
+    def fetch_batch(self, tickers, start_date, end_date, timeout):
+        """Fetch several tickers at once. Returns dict of ticker -> DataFrame."""
+        raise NotImplementedError
+
+    def fetch_one(self, ticker, start_date, end_date, timeout):
+        """
+        Fetch a single ticker. Must be safe to call from several threads.
+        Raises on transport errors so the caller can retry.
+        """
+        raise NotImplementedError
+
+    def fetch_quotes(self, tickers, timeout):
+        """
+        Fetch the latest trade price for several tickers in one request.
+        Returns dict of ticker -> (naive ET Timestamp, price); tickers with
+        no quote are left out.
+        """
+        raise NotImplementedError
+
+
+def _split_batch(df, tickers):
+    """
+    Split a grouped multi-ticker download into one DataFrame per ticker.
+    Tickers missing from the response map to an empty DataFrame.
+    """
+    frames = {}
+    for ticker in tickers:
+        if isinstance(df.columns, pd.MultiIndex) and ticker in df.columns.get_level_values(0):
+            # Rows are the union of all tickers' dates; drop the ones this ticker lacks
+            frames[ticker] = df[ticker].dropna(how='all')
+        else:
+            frames[ticker] = pd.DataFrame()
+    return frames
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Live daily bars from Yahoo Finance."""
+
+    def fetch_batch(self, tickers, start_date, end_date, timeout):
+        import yfinance as yf
+        df = yf.download(tickers, start=start_date, end=end_date, group_by='ticker',
+                         progress=False, timeout=timeout)
+        return _split_batch(df, tickers)
+
+    def fetch_one(self, ticker, start_date, end_date, timeout):
+        # Ticker.history rather than yf.download, which keeps its results in a
+        # module-level dict and is not safe to call from several threads
+        import yfinance as yf
+        df = yf.Ticker(ticker).history(start=start_date, end=end_date, timeout=timeout,
+                                       raise_errors=True)
+        if df.empty:
+            return df
+        df.index = df.index.tz_localize(None)
+        return df[OHLCV_COLUMNS]
+
+    def fetch_quotes(self, tickers, timeout):
+        # Today's 1-minute bars for the whole universe in one grouped request;
+        # the last close of each is the latest trade price
+        import yfinance as yf
+        df = yf.download(tickers, period='1d', interval='1m', group_by='ticker',
+                         progress=False, timeout=timeout)
+        quotes = {}
+        for ticker, bars in _split_batch(df, tickers).items():
+            if bars.empty:
+                continue
+            close = bars['Close'].dropna()
+            if close.empty:
+                continue
+            timestamp = close.index[-1]
+            if timestamp.tzinfo is not None:
+                timestamp = timestamp.tz_convert('America/New_York').tz_localize(None)
+            quotes[ticker] = (timestamp, float(close.iloc[-1]))
+        return quotes
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Serves recorded daily bars from a directory, one file per ticker:
+    <TICKER>.csv, <TICKER>.parquet or <TICKER>.npz (the price cache layout).
+
+    Requests are answered as if "today" were `as_of`; by default that is the
+    date of the newest recorded bar, so a recording replays the same way no
+    matter when it is run.
+    """
+
+    cacheable = False
+
+    def __init__(self, directory, as_of=None):
+        self.directory = directory
+        self._bars = {}
+        self._as_of = pd.Timestamp(as_of) if as_of is not None else None
+
+    def _load(self, ticker):
+        if ticker in self._bars:
+            return self._bars[ticker]
+
+        df = pd.DataFrame()
+        for ext in ('.parquet', '.npz', '.csv'):
+            path = os.path.join(self.directory, ticker + ext)
+            if not os.path.exists(path):
+                continue
+            if ext == '.parquet':
+                df = pd.read_parquet(path)
+            elif ext == '.npz':
+                with np.load(path, allow_pickle=False) as data:
+                    df = pd.DataFrame(
+                        {str(c): data[f"col_{c}"] for c in data['columns']},
+                        index=pd.DatetimeIndex(data['dates'].astype('datetime64[ns]'))
+                    )
+            else:
+                df = pd.read_csv(path, index_col=0, parse_dates=True)
+            df.index = pd.DatetimeIndex(df.index).tz_localize(None).normalize()
+            df.index.name = 'Date'
+            df = df[[c for c in OHLCV_COLUMNS if c in df.columns]].sort_index()
+            break
+
+        self._bars[ticker] = df
+        return df
+
+    def as_of(self):
+        """The replayed "today"."""
+        if self._as_of is None:
+            last_dates = [self._load(os.path.splitext(name)[0]).index.max()
+                          for name in os.listdir(self.directory)
+                          if name.endswith(('.csv', '.parquet', '.npz'))]
+            last_dates = [d for d in last_dates if not pd.isna(d)]
+            self._as_of = max(last_dates) if last_dates else pd.Timestamp.now()
+        return self._as_of.normalize()
+
+    def _window(self, ticker, start_date, end_date):
+        df = self._load(ticker)
+        if df.empty:
+            return df
+        # Shift the requested window so its end lands on the replayed "today"
+        end = self.as_of()
+        shift = end - pd.Timestamp(end_date).normalize()
+        start = (pd.Timestamp(start_date) + shift).normalize()
+        return df[(df.index >= start) & (df.index <= end)]
+
+    def fetch_batch(self, tickers, start_date, end_date, timeout):
+        return {ticker: self._window(ticker, start_date, end_date) for ticker in tickers}
+
+    def fetch_one(self, ticker, start_date, end_date, timeout):
+        return self._window(ticker, start_date, end_date)
+
+    def fetch_quotes(self, tickers, timeout):
+        # The replayed day's close stands in for the live price
+        quotes = {}
+        for ticker in tickers:
+            df = self._load(ticker)
+            df = df[df.index <= self.as_of()] if not df.empty else df
+            if not df.empty:
+                quotes[ticker] = (df.index[-1], float(df['Close'].iloc[-1]))
+        return quotes
+
+
+def record_bars(frames, directory, fmt='csv'):
+    """
+    Write fetched bars to `directory` in a format ReplayProvider can serve.
+    fmt: 'csv' or 'parquet' (parquet needs pyarrow).
+    """
+    os.makedirs(directory, exist_ok=True)
+    for ticker, df in frames.items():
+        path = os.path.join(directory, f"{ticker}.{fmt}")
+        if fmt == 'parquet':
+            df.to_parquet(path)
+        else:
+            df.to_csv(path)
+
+
+def get_provider():
+    """
+    Pick the provider for this run.
+    Set MARKET_DATA_REPLAY_DIR to replay recorded bars instead of hitting the
+    network (MARKET_DATA_REPLAY_AS_OF optionally pins the replayed date).
+    """
+    replay_dir = os.environ.get('MARKET_DATA_REPLAY_DIR')
+    if replay_dir:
+        return ReplayProvider(replay_dir, as_of=os.environ.get('MARKET_DATA_REPLAY_AS_OF'))
+    return YFinanceProvider()
@@ -0,0 +1,451 @@
+"""
+Compiled decision tree for the trading algorithm.
+The nested LOGIC_TREE dict is flattened once into parallel arrays (feature
+index, threshold, operator code, true/false child), so evaluating it is a
+tight loop over integers that can be reused across many evaluations, and
+whole histories can be evaluated at once with one boolean mask per node.
+
+CompiledTree.source() also renders the tree as a Python function of nested
+if statements for callers that evaluate one vector at a time at high rates.
+
+Every root-to-leaf path is also a region: a box of per-feature bounds that
+all feature vectors taking that path fall into.
+
+A node with "type": "rank" is a terminal that picks the k lowest (or
+highest) of an indicator over a set of tickers instead of naming a fixed
+signal; its candidates' values are part of the feature vector.
+
+Run this file to check evaluate_many() against evaluate():
+
+    python3 decision_engine.py
+"""
+
+import sys
+
+import numpy as np
+
+# Operator codes
+OP_GT = 0
+OP_LT = 1
+OPERATOR_CODES = {'>': OP_GT, '<': OP_LT}
+
+# Rank node directions: whether the highest values rank first
+RANK_DIRECTIONS = {'bottom': False, 'top': True}
+
+
+def select_k(scores, k, largest=False):
+    """
+    Positions of the k lowest (or highest) scores of every row, best first.
+
+    A partial selection finds each row's k-th score in linear time, so only
+    the k picks are ever sorted. Ties go to the earlier position, exactly
+    as a stable full sort would rank them.
+
+    Args:
+        scores: array of shape (rows, candidates), no NaN
+        k: picks per row (capped at the number of candidates)
+        largest: rank the highest scores first
+    Returns: int array of shape (rows, k)
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    if largest:
+        scores = -scores
+    rows, candidates = scores.shape
+    k = min(k, candidates)
+
+    kth = np.partition(scores, k - 1, axis=1)[:, k - 1:k]
+    below = scores < kth
+    tied = scores == kth
+    # Of the candidates tied with the k-th score, keep the first ones
+    room = k - below.sum(axis=1, keepdims=True)
+    picked = below | (tied & (np.cumsum(tied, axis=1) <= room))
+
+    positions = np.nonzero(picked)[1].reshape(rows, k)
+    order = np.argsort(np.take_along_axis(scores, positions, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(positions, order, axis=1)
+
+
+def is_rank_node(node):
+    """Whether a tree node is a rank node rather than a comparison."""
+    return node.get('type') == 'rank'
+
+
+class CompiledTree:
+    """
+    Flat, array-backed form of a decision tree.
+
+    Nodes are numbered 0..n-1 in breadth-first order from the root (node 0).
+    Children >= 0 are node indices; a child < 0 is a leaf, stored as
+    ~leaf_index into `leaves`.
+
+    Attributes:
+        features: list of (indicator, ticker, window) the nodes read;
+                  feature vectors passed to evaluate() follow this order
+        leaves: interned list of terminal results
+        ranks: leaf index -> rank node spec, for leaves that are rank nodes
+               ({'id', 'tickers', 'indicator', 'window', 'k', 'largest',
+               'features': feature index of each ticker})
+        node_ids: original tree ID of each node
+        nodes: original node dict of each node (for display)
+        feature, threshold, op, true_child, false_child: per-node arrays
+    """
+
+    def __init__(self, features, leaves, node_ids, nodes, feature, threshold, op,
+                 true_child, false_child, ranks=None):
+        self.features = features
+        self.feature_index = {f: i for i, f in enumerate(features)}
+        self.leaves = leaves
+        self.ranks = ranks or {}
+        self.node_ids = node_ids
+        self.nodes = nodes
+        self.feature = np.array(feature, dtype=np.intp)
+        self.threshold = np.array(threshold, dtype=np.float64)
+        self.op = np.array(op, dtype=np.int8)
+        self.true_child = np.array(true_child, dtype=np.intp)
+        self.false_child = np.array(false_child, dtype=np.intp)
+        # Plain lists: indexing them is much faster than NumPy scalars
+        self._program = (list(feature), [float(t) for t in threshold], list(op),
+                         list(true_child), list(false_child))
+        self._topo_order = self._topological_order()
+
+    def _topological_order(self):
+        """Node indices ordered so every node comes after all its parents."""
+        parents = np.zeros(len(self.node_ids), dtype=int)
+        for child in np.concatenate([self.true_child, self.false_child]):
+            if child >= 0:
+                parents[child] += 1
+        order = []
+        ready = [0]
+        while ready:
+            node = ready.pop(0)
+            order.append(node)
+            for child in (self.true_child[node], self.false_child[node]):
+                if child >= 0:
+                    parents[child] -= 1
+                    if parents[child] == 0:
+                        ready.append(int(child))
+        return order
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    def branch(self, node, value):
+        """Outcome of one node's comparison and the child it leads to."""
+        feature, threshold, op, true_child, false_child = self._program
+        result = value > threshold[node] if op[node] == OP_GT else value < threshold[node]
+        return result, (true_child[node] if result else false_child[node])
+
+    def evaluate(self, values):
+        """
+        Walk the tree for one feature vector.
+        Returns: (leaf index, path as a list of visited node indices)
+        """
+        feature, threshold, op, true_child, false_child = self._program
+        node = 0
+        path = []
+        while node >= 0:
+            path.append(node)
+            value = values[feature[node]]
+            if (value > threshold[node]) if op[node] == OP_GT else (value < threshold[node]):
+                node = true_child[node]
+            else:
+                node = false_child[node]
+        return ~node, path
+
+    def evaluate_leaf(self, values):
+        """Like evaluate(), but only returns the leaf index."""
+        feature, threshold, op, true_child, false_child = self._program
+        node = 0
+        while node >= 0:
+            value = values[feature[node]]
+            if (value > threshold[node]) if op[node] == OP_GT else (value < threshold[node]):
+                node = true_child[node]
+            else:
+                node = false_child[node]
+        return ~node
+
+    def evaluate_many(self, values):
+        """
+        Evaluate the tree for many feature vectors at once, e.g. one per date.
+
+        Instead of walking each row, every node splits the rows that reach
+        it with one boolean mask, so the cost is one vectorized comparison
+        per node regardless of the number of rows. A NaN feature compares
+        False, as it does in evaluate().
+
+        Args:
+            values: array of shape (rows, len(features))
+        Returns:
+            (leaf index per row, visited) where visited is a bool array of
+            shape (rows, nodes) marking each row's path; see path()
+        """
+        values = np.asarray(values, dtype=np.float64)
+        rows = values.shape[0]
+        visited = np.zeros((rows, len(self.node_ids)), dtype=bool)
+        leaf = np.full(rows, -1, dtype=np.intp)
+        visited[:, 0] = True
+
+        for node in self._topo_order:
+            reached = visited[:, node]
+            if not reached.any():
+                continue
+            column = values[:, self.feature[node]]
+            with np.errstate(invalid='ignore'):
+                result = column > self.threshold[node] if self.op[node] == OP_GT \
+                    else column < self.threshold[node]
+            for child, mask in ((self.true_child[node], reached & result),
+                                (self.false_child[node], reached & ~result)):
+                if child >= 0:
+                    visited[:, child] |= mask
+                else:
+                    leaf[mask] = ~child
+
+        return leaf, visited
+
+    def path(self, visited_row):
+        """
+        Node indices of one row of evaluate_many()'s `visited`, root first.
+        A row's visited nodes form one chain from the root, so listing them
+        in topological order gives traversal order, even where two parents
+        share a child (ascending index would not: 1 -> 3 -> 2).
+        """
+        return [node for node in self._topo_order if visited_row[node]]
+
+    def rank(self, leaf, values):
+        """
+        Candidates a rank leaf picks for one feature vector.
+        Returns: list of positions into ranks[leaf]['tickers'], best first
+        """
+        spec = self.ranks[leaf]
+        scores = np.array([[values[f] for f in spec['features']]], dtype=np.float64)
+        return [int(i) for i in select_k(scores, spec['k'], spec['largest'])[0]]
+
+    def rank_many(self, leaf, values):
+        """
+        rank() for every row of a (rows, len(features)) array at once.
+        Returns: int array of shape (rows, k)
+        """
+        spec = self.ranks[leaf]
+        return select_k(np.asarray(values)[:, spec['features']], spec['k'], spec['largest'])
+
+    def region(self, path, results):
+        """
+        The box of feature values that leads down `path`.
+
+        Each node narrows one feature: "x > t" true gives x in (t, inf),
+        false gives x in (-inf, t]; "x < t" the other way round. NaN falls
+        in no region.
+
+        Args:
+            path: node indices, root first
+            results: each node's comparison outcome
+        Returns: {feature index: [low, high, low_closed, high_closed]} for
+                 the features the path constrains
+        """
+        bounds = {}
+        for node, result in zip(path, results):
+            low, high, low_closed, high_closed = bounds.get(
+                int(self.feature[node]), [-np.inf, np.inf, False, False])
+            threshold = float(self.threshold[node])
+            # Whether this node bounds the feature from below
+            from_below = bool(result) == (self.op[node] == OP_GT)
+            closed = not result
+            if from_below and (threshold > low or (threshold == low and not closed)):
+                low, low_closed = threshold, closed
+            elif not from_below and (threshold < high or (threshold == high and not closed)):
+                high, high_closed = threshold, closed
+            bounds[int(self.feature[node])] = [low, high, low_closed, high_closed]
+        return bounds
+
+    def regions(self):
+        """
+        Every leaf's regions, one per root-to-leaf path.
+        Returns: list of (leaf index, path, region())
+        """
+        found = []
+        stack = [([0], [])]
+        while stack:
+            path, results = stack.pop()
+            node = path[-1]
+            for result, child in ((True, self.true_child[node]), (False, self.false_child[node])):
+                if child < 0:
+                    found.append((~int(child), path, self.region(path, results + [result])))
+                else:
+                    stack.append((path + [int(child)], results + [result]))
+        return found
+
+    @staticmethod
+    def in_region(region, get_value):
+        """
+        Whether a point lies in a region, reading only the constrained
+        features through get_value(feature index).
+        """
+        for feature, (low, high, low_closed, high_closed) in region.items():
+            value = get_value(feature)
+            if not (value >= low if low_closed else value > low):
+                return False
+            if not (value <= high if high_closed else value < high):
+                return False
+        return True
+
+    def source(self, name='evaluate_leaf'):
+        """
+        Python source of a function equivalent to evaluate_leaf(), with the
+        tree unrolled into nested if statements over local floats.
+
+        The feature vector is unpacked into locals once, and every node
+        becomes one comparison against its threshold literal, so a call
+        does no indexing, no operator dispatch and no loop. NaN compares
+        False and takes the false branch, as in evaluate().
+
+        Returns: source code defining `name(values)` -> leaf index
+        """
+        lines = [
+            f"def {name}(values):",
+            f"    {', '.join(f'f{i}' for i in range(len(self.features)))}, = values",
+        ]
+
+        def emit(node, depth):
+            indent = "    " * depth
+            indicator, ticker, window = self.features[self.feature[node]]
+            operator = '>' if self.op[node] == OP_GT else '<'
+            lines.append(f"{indent}# ID {self.node_ids[node]}: {indicator}({ticker}, {window})".replace("\n", " "))
+            lines.append(f"{indent}if f{self.feature[node]} {operator} {float(self.threshold[node])!r}:")
+            for child, prefix in ((self.true_child[node], None), (self.false_child[node], "else:")):
+                if prefix:
+                    lines.append(indent + prefix)
+                if child >= 0:
+                    emit(int(child), depth + 1)
+                else:
+                    comment = str(self.leaves[~int(child)]).replace("\n", " ")
+                    lines.append(f"{indent}    return {~int(child)}  # {comment}")
+
+        emit(0, 1)
+        return "\n".join(lines) + "\n"
+
+    def feature_vector(self, get_value):
+        """Build a feature vector by calling get_value(indicator, ticker, window)."""
+        return [get_value(*f) for f in self.features]
+
+
+def compile_tree(tree, root=1):
+    """
+    Compile a LOGIC_TREE-style dict ({id: node}) into a CompiledTree.
+    Only nodes reachable from `root` are kept; rank nodes become leaves
+    (see CompiledTree.ranks).
+    """
+    order = []
+    index = {}
+    queue = [root]
+    while queue:
+        node_id = queue.pop(0)
+        if node_id in index:
+            continue
+        index[node_id] = len(order)
+        order.append(node_id)
+        node = tree[node_id]
+        queue += [child for child in (node['true'], node['false'])
+                  if not isinstance(child, str) and not is_rank_node(tree[child])]
+
+    features = []
+    feature_index = {}
+    leaves = []
+    leaf_index = {}
+    ranks = {}
+
+    def feature_code(requirement):
+        if requirement not in feature_index:
+            feature_index[requirement] = len(features)
+            features.append(requirement)
+        return feature_index[requirement]
+
+    def child_code(child):
+        if isinstance(child, str):
+            key, label = child, child
+        elif is_rank_node(tree[child]):
+            key, label = ('rank', child), tree[child].get('label', f"RANK {child}")
+        else:
+            return index[child]
+
+        if key not in leaf_index:
+            leaf_index[key] = len(leaves)
+            leaves.append(label)
+            if not isinstance(child, str):
+                node = tree[child]
+                indicator = node.get('indicator', 'rsi_sma')
+                ranks[leaf_index[key]] = {
+                    'id': child,
+                    'tickers': list(node['tickers']),
+                    'indicator': indicator,
+                    'window': node['window'],
+                    'k': node['k'],
+                    'largest': RANK_DIRECTIONS[node.get('direction', 'bottom')],
+                    'features': [feature_code((indicator, ticker, node['window']))
+                                 for ticker in node['tickers']],
+                }
+        return ~leaf_index[key]
+
+    feature, threshold, op, true_child, false_child = [], [], [], [], []
+    for node_id in order:
+        node = tree[node_id]
+        feature.append(feature_code((node.get('indicator', 'rsi_sma'), node['ticker'], node['window'])))
+        threshold.append(node['threshold'])
+        op.append(OPERATOR_CODES[node.get('operator', '>')])
+        true_child.append(child_code(node['true']))
+        false_child.append(child_code(node['false']))
+
+    return CompiledTree(features, leaves, order, [tree[node_id] for node_id in order],
+                        feature, threshold, op, true_child, false_child, ranks)
+
+
+def test_evaluate_many(trees=200, rows=500, seed=0):
+    """
+    Randomized check that evaluate_many() gives, row for row, the leaf of
+    evaluate() and, through path(), the same traversal path.
+
+    Random trees mix both operators and let several parents share a child;
+    feature values are drawn at, near and far from the thresholds, plus
+    NaN.
+
+    Returns: number of mismatching rows (0 when identical)
+    """
+    print("\n" + "="*80)
+    print("UNIT TEST: evaluate_many() vs evaluate()")
+    print("="*80)
+
+    rng = np.random.default_rng(seed)
+    mismatches = 0
+    for _ in range(trees):
+        size = int(rng.integers(1, 30))
+        tickers = [f"T{i}" for i in range(rng.integers(1, 8))]
+        levels = [float(level) for level in rng.integers(20, 80, 6)]
+        tree = {}
+        for node_id in range(1, size + 1):
+            children = [int(rng.integers(node_id + 1, size + 1)) if node_id < size and rng.random() < 0.7
+                        else f"LEAF {rng.integers(0, 5)}" for _ in range(2)]
+            tree[node_id] = {
+                'ticker': str(rng.choice(tickers)),
+                'window': 9,
+                'threshold': levels[rng.integers(0, len(levels))],
+                'operator': '>' if rng.random() < 0.5 else '<',
+                'true': children[0],
+                'false': children[1],
+            }
+        compiled = compile_tree(tree)
+
+        values = rng.choice(levels + [np.nan], size=(rows, len(compiled.features)))
+        values += rng.choice([0.0, 0.0, 1e-9, -1e-9, 5.0, -5.0], size=values.shape)
+        leaf, visited = compiled.evaluate_many(values)
+        for row in range(rows):
+            expected_leaf, expected_path = compiled.evaluate(list(values[row]))
+            if leaf[row] != expected_leaf or compiled.path(visited[row]) != expected_path:
+                mismatches += 1
+
+    print(f"Trees: {trees}, rows each: {rows}, mismatches: {mismatches}")
+    print("✓ Identical leaves and paths" if mismatches == 0 else "❌ evaluate_many() differs from evaluate()")
+    print("="*80 + "\n")
+    return mismatches
+
+
+if __name__ == "__main__":
+    sys.exit(1 if test_evaluate_many() else 0)
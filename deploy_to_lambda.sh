@@ -22,6 +22,14 @@ cp main.py lambda_package/
 cp lambda_function.py lambda_package/
 cp state_manager.py lambda_package/
 cp market_hours.py lambda_package/
+cp price_cache.py lambda_package/
+cp data_provider.py lambda_package/
+cp price_matrix.py lambda_package/
+cp indicators.py lambda_package/
+cp decision_engine.py lambda_package/
+cp strategy.py lambda_package/
+cp triggers.py lambda_package/
+cp -r strategies lambda_package/
 
 # Create ZIP file
 echo "📦 Creating deployment package..."
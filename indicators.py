@@ -0,0 +1,520 @@
+"""
+RSI indicator math for the trading algorithm.
+calculate_rsi_sma() is the reference single-series implementation; the
+batch engine computes many (ticker, window) pairs over a PriceMatrix at
+once and returns exactly the same values, and RollingRSI keeps one series
+up to date bar by bar in constant time. rsi_series() returns the whole
+rolling RSI history for analysis.
+
+INDICATORS is the registry of indicators a strategy node can ask for, and
+IndicatorEngine computes each (indicator, ticker, window) requirement once,
+on first access, sharing per-ticker intermediates across windows.
+feature_history() evaluates the same requirements at every date of a
+PriceMatrix for historical analysis.
+
+Run this file to check the batch engine against calculate_rsi_sma():
+
+    python3 indicators.py
+"""
+
+import math
+import sys
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def calculate_rsi_sma(prices, window=9):
+    """
+    Calculate RSI using Simple Moving Average (SMA) method.
+    This matches the Google Sheet calculation.
+
+    Formula:
+    1. Diff = Close - PrevClose
+    2. Up = Diff if > 0 else 0, Down = Abs(Diff) if < 0 else 0
+    3. AvgUp = SMA(Up, window), AvgDown = SMA(Down, window)
+    4. RS = AvgUp / AvgDown
+    5. RSI = 100 - (100 / (1 + RS))
+    """
+    if len(prices) < window + 1:
+        return None
+
+    # Calculate price differences
+    diffs = np.diff(prices)
+
+    # Separate ups and downs
+    ups = np.where(diffs > 0, diffs, 0)
+    downs = np.where(diffs < 0, np.abs(diffs), 0)
+
+    # Calculate SMA of ups and downs (last 'window' values)
+    avg_up = np.mean(ups[-(window):])
+    avg_down = np.mean(downs[-(window):])
+
+    # Avoid division by zero
+    if avg_down == 0:
+        return 100.0
+
+    # Calculate RS and RSI
+    rs = avg_up / avg_down
+    rsi = 100 - (100 / (1 + rs))
+
+    return rsi
+
+
+def _right_align(closes):
+    """
+    Move each row's valid (non-NaN) closes to the right end, keeping order.
+    Rows that are only NaN-padded on the left are already aligned, so the
+    common case returns the input array itself (no copy).
+    Returns: (aligned 2-D array, valid count per row)
+    """
+    valid = ~np.isnan(closes)
+    counts = valid.sum(axis=1)
+    if closes.shape[1] < 2 or np.all(valid[:, 1:] >= valid[:, :-1]):
+        return closes, counts
+    # Stable sort puts the NaNs (False) first and keeps the closes in order
+    order = np.argsort(valid, axis=1, kind='stable')
+    return np.take_along_axis(closes, order, axis=1), counts
+
+
+def calculate_rsi_batch(matrix, pairs):
+    """
+    Calculate SMA-RSI for many (ticker, window) pairs over a PriceMatrix.
+
+    The diffs and up/down split are computed once for the whole matrix; each
+    distinct window is then one vectorized mean over the rows that need it.
+    Tickers whose valid history is shorter than window + 1 are masked out.
+    Results are identical to calling calculate_rsi_sma() on each ticker's
+    NaN-filtered closes.
+
+    Returns: dict of (ticker, window) -> RSI, or None where history is short
+    """
+    aligned, counts = _right_align(matrix.closes)
+    diffs = np.diff(aligned, axis=1)
+    with np.errstate(invalid='ignore'):
+        ups = np.where(diffs > 0, diffs, 0)
+        downs = np.where(diffs < 0, np.abs(diffs), 0)
+
+    by_window = {}
+    for ticker, window in pairs:
+        if ticker in matrix:
+            by_window.setdefault(window, []).append(ticker)
+
+    results = {pair: None for pair in pairs}
+    for window, tickers in by_window.items():
+        rows = np.array([matrix.index[ticker] for ticker in tickers])
+        enough = counts[rows] >= window + 1
+        if window > diffs.shape[1] or not enough.any():
+            continue
+
+        avg_up = ups[rows, -window:].mean(axis=1)
+        avg_down = downs[rows, -window:].mean(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rs = avg_up / avg_down
+            rsi = 100 - (100 / (1 + rs))
+        rsi = np.where(avg_down == 0, 100.0, rsi)
+
+        for ticker, value, ok in zip(tickers, rsi, enough):
+            if ok:
+                results[(ticker, window)] = value
+
+    return results
+
+
+def rsi_series(prices, window=9):
+    """
+    Rolling SMA-RSI for every bar of a price array in one vectorized pass.
+
+    `prices` is 1-D, or 2-D with one series per row (e.g. PriceMatrix.closes)
+    and time along the last axis. Element [..., t] is the RSI of the closes
+    up to and including t, so the last element equals
+    calculate_rsi_sma(prices, window) exactly. The first `window` elements,
+    and any window that touches a missing (NaN) close, are NaN.
+
+    Returns: float array with the same shape as prices
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    out = np.full(prices.shape, np.nan)
+    if prices.shape[-1] < window + 1:
+        return out
+
+    diffs = np.diff(prices, axis=-1)
+    with np.errstate(invalid='ignore'):
+        ups = np.where(diffs > 0, diffs, 0)
+        downs = np.where(diffs < 0, np.abs(diffs), 0)
+
+    # Means over each trailing window of diffs (views, no copies)
+    avg_up = sliding_window_view(ups, window, axis=-1).mean(axis=-1)
+    avg_down = sliding_window_view(downs, window, axis=-1).mean(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = avg_up / avg_down
+        rsi = 100 - (100 / (1 + rs))
+    rsi = np.where(avg_down == 0, 100.0, rsi)
+
+    # A NaN close turns into a 0 up/down above; blank out windows containing one
+    missing = np.isnan(diffs)
+    if missing.any():
+        rsi[sliding_window_view(missing, window, axis=-1).any(axis=-1)] = np.nan
+
+    out[..., window:] = rsi
+    return out
+
+
+class RollingRSI:
+    """
+    Incremental SMA-RSI for one (ticker, window) series.
+
+    Keeps a ring buffer of the last `window` diffs and running sums of their
+    ups and downs, so appending a bar or revising the latest one (e.g. the
+    provisional intraday close) costs O(1) instead of re-diffing the whole
+    history. Sums are recomputed exactly from the buffer every RESYNC_EVERY
+    updates, and on load, so floating-point drift stays bounded. Values agree
+    with calculate_rsi_sma() to within rounding.
+
+    This is a standalone utility for streaming consumers (tick loops,
+    simulations); the scheduled runs do not use it. Their RSI(9) needs only
+    10 closes, which the intraday path already has in the cache, and their
+    decisions, trigger prices and input fingerprints rely on values that
+    match calculate_rsi_sma() bit for bit, which running sums do not
+    guarantee. Persist a state with to_dict() / from_dict() when one must
+    survive between runs.
+    """
+
+    RESYNC_EVERY = 250
+
+    def __init__(self, window=9):
+        self.window = window
+        self.diffs = np.zeros(window)
+        self.pos = 0              # ring slot the next diff goes into
+        self.count = 0            # diffs held, capped at window
+        self.last_close = None
+        self.prev_close = None    # close before last_close, for revise()
+        self.sum_up = 0.0
+        self.sum_down = 0.0
+        self.downs = 0            # number of negative diffs held
+        self.updates = 0
+
+    @classmethod
+    def from_prices(cls, prices, window=9):
+        """Seed the state from a price history (NaNs removed)."""
+        state = cls(window)
+        prices = np.asarray(prices, dtype=np.float64)
+        prices = prices[~np.isnan(prices)][-(window + 1):]
+        for close in prices:
+            state.append(float(close))
+        state.resync()
+        return state
+
+    def _add(self, diff, sign):
+        if diff > 0:
+            self.sum_up += sign * diff
+        elif diff < 0:
+            self.sum_down += sign * -diff
+            self.downs += sign
+        if self.downs == 0:
+            # No downs left: make "avg_down == 0" exact rather than residual
+            self.sum_down = 0.0
+
+    def _tick(self):
+        self.updates += 1
+        if self.updates % self.RESYNC_EVERY == 0:
+            self.resync()
+
+    def append(self, close):
+        """Add a new bar's close."""
+        if self.last_close is not None:
+            diff = close - self.last_close
+            if self.count == self.window:
+                self._add(self.diffs[self.pos], -1)
+            else:
+                self.count += 1
+            self.diffs[self.pos] = diff
+            self._add(diff, +1)
+            self.pos = (self.pos + 1) % self.window
+            self._tick()
+        self.prev_close = self.last_close
+        self.last_close = close
+
+    def revise(self, close):
+        """Replace the latest bar's close (e.g. a newer intraday price)."""
+        if self.prev_close is None:
+            self.last_close = close
+            return
+        slot = (self.pos - 1) % self.window
+        self._add(self.diffs[slot], -1)
+        self.diffs[slot] = close - self.prev_close
+        self._add(self.diffs[slot], +1)
+        self.last_close = close
+        self._tick()
+
+    def resync(self):
+        """Recompute the running sums exactly from the ring buffer."""
+        held = self.diffs[:self.count] if self.count < self.window else self.diffs
+        self.sum_up = math.fsum(d for d in held if d > 0)
+        self.sum_down = math.fsum(-d for d in held if d < 0)
+        self.downs = int(np.count_nonzero(held < 0))
+
+    def value(self):
+        """Current RSI, or None until `window` diffs have been seen."""
+        if self.count < self.window:
+            return None
+
+        avg_up = self.sum_up / self.window
+        avg_down = self.sum_down / self.window
+
+        if avg_down == 0:
+            return 100.0
+
+        rs = avg_up / avg_down
+        return 100 - (100 / (1 + rs))
+
+    def to_dict(self):
+        """JSON-serializable state; diffs are stored oldest first."""
+        if self.count < self.window:
+            diffs = self.diffs[:self.count]
+        else:
+            diffs = np.roll(self.diffs, -self.pos)
+        return {
+            'window': self.window,
+            'diffs': [float(d) for d in diffs],
+            'last_close': self.last_close,
+            'prev_close': self.prev_close,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a state saved with to_dict()."""
+        state = cls(data['window'])
+        diffs = data['diffs']
+        state.count = len(diffs)
+        state.diffs[:state.count] = diffs
+        state.pos = state.count % state.window
+        state.last_close = data['last_close']
+        state.prev_close = data['prev_close']
+        state.resync()
+        return state
+
+
+# Registry of indicators: name -> {'func', 'rows', 'label', 'series'}
+#   func(engine, ticker, window) -> value, or None if history is too short
+#   rows(window) -> closes needed
+#   label: short name used in reports, e.g. "RSI(9)"
+#   series(closes, window) -> value at every date of a 2-D closes array
+INDICATORS = {}
+
+
+def register_indicator(name, rows, label, series=None):
+    """Decorator that adds an indicator function to INDICATORS."""
+    def decorator(func):
+        INDICATORS[name] = {'func': func, 'rows': rows, 'label': label, 'series': series}
+        return func
+    return decorator
+
+
+def _trailing(closes, window, reduce):
+    """Apply reduce(windows) over each trailing window; NaN before the first full one."""
+    out = np.full(closes.shape, np.nan)
+    if closes.shape[-1] >= window:
+        out[..., window - 1:] = reduce(sliding_window_view(closes, window, axis=-1))
+    return out
+
+
+def _sma_series(closes, window):
+    return _trailing(closes, window, lambda w: w.mean(axis=-1))
+
+
+def _cumulative_return_series(closes, window):
+    out = np.full(closes.shape, np.nan)
+    if closes.shape[-1] > window:
+        out[..., window:] = (closes[..., window:] / closes[..., :-window] - 1) * 100
+    return out
+
+
+def _max_drawdown_series(closes, window):
+    def reduce(windows):
+        peaks = np.maximum.accumulate(windows, axis=-1)
+        return np.max((peaks - windows) / peaks, axis=-1) * 100
+    return _trailing(closes, window, reduce)
+
+
+@register_indicator('rsi_sma', rows=lambda window: window + 1, label='RSI', series=rsi_series)
+def _rsi_sma(engine, ticker, window):
+    """SMA-RSI, same math as calculate_rsi_sma() on the shared up/down vectors."""
+    ups, downs = engine.moves(ticker)
+    if len(ups) < window:
+        return None
+
+    avg_up = np.mean(ups[-(window):])
+    avg_down = np.mean(downs[-(window):])
+
+    if avg_down == 0:
+        return 100.0
+
+    rs = avg_up / avg_down
+    return 100 - (100 / (1 + rs))
+
+
+@register_indicator('sma', rows=lambda window: window, label='SMA', series=_sma_series)
+def _sma(engine, ticker, window):
+    """Simple moving average of the last `window` closes."""
+    closes = engine.closes(ticker)
+    if len(closes) < window:
+        return None
+    return np.mean(closes[-window:])
+
+
+@register_indicator('cumulative_return', rows=lambda window: window + 1, label='CumRet',
+                    series=_cumulative_return_series)
+def _cumulative_return(engine, ticker, window):
+    """Percent return over the last `window` bars."""
+    closes = engine.closes(ticker)
+    if len(closes) < window + 1:
+        return None
+    return (closes[-1] / closes[-(window + 1)] - 1) * 100
+
+
+@register_indicator('max_drawdown', rows=lambda window: window, label='MaxDD',
+                    series=_max_drawdown_series)
+def _max_drawdown(engine, ticker, window):
+    """Largest peak-to-trough decline within the last `window` closes, in percent."""
+    closes = engine.closes(ticker)
+    if len(closes) < window:
+        return None
+    recent = closes[-window:]
+    peaks = np.maximum.accumulate(recent)
+    return np.max((peaks - recent) / peaks) * 100
+
+
+class IndicatorEngine:
+    """
+    Lazily computes and caches indicator values over a price source.
+
+    `prices` is anything with series(ticker) and `in` support, normally a
+    PriceMatrix. Each (indicator, ticker, window) requirement is computed at
+    most once, on first get(). Per-ticker intermediates (closes, and the
+    diff/up/down vectors every RSI window reads) are cached too, so RSI(9),
+    RSI(50) and RSI(60) of one ticker diff its closes only once.
+    """
+
+    def __init__(self, prices):
+        self.prices = prices
+        self.values = {}
+        self._closes = {}
+        self._moves = {}
+
+    def closes(self, ticker):
+        """A ticker's closes with missing days removed."""
+        if ticker not in self._closes:
+            self._closes[ticker] = self.prices.series(ticker)
+        return self._closes[ticker]
+
+    def moves(self, ticker):
+        """(ups, downs) of a ticker's close-to-close diffs."""
+        if ticker not in self._moves:
+            diffs = np.diff(self.closes(ticker))
+            ups = np.where(diffs > 0, diffs, 0)
+            downs = np.where(diffs < 0, np.abs(diffs), 0)
+            self._moves[ticker] = (ups, downs)
+        return self._moves[ticker]
+
+    def get(self, name, ticker, window):
+        """Value of one requirement, computed on first access."""
+        key = (name, ticker, window)
+        if key not in self.values:
+            if ticker in self.prices:
+                self.values[key] = INDICATORS[name]['func'](self, ticker, window)
+            else:
+                self.values[key] = None
+        return self.values[key]
+
+    def compute(self, requirements):
+        """
+        Eagerly compute a list of (indicator, ticker, window) requirements.
+        Over a PriceMatrix all RSI-SMA requirements go through one
+        calculate_rsi_batch() pass; the rest are computed one by one.
+        Returns: dict of requirement -> value, in first-seen order
+        """
+        requirements = list(dict.fromkeys(requirements))
+        pending = [key for key in requirements if key not in self.values]
+
+        rsi_pairs = [(ticker, window) for name, ticker, window in pending if name == 'rsi_sma']
+        if rsi_pairs and hasattr(self.prices, 'closes'):
+            for (ticker, window), value in calculate_rsi_batch(self.prices, rsi_pairs).items():
+                self.values[('rsi_sma', ticker, window)] = value
+
+        return {key: self.get(*key) for key in requirements}
+
+
+def feature_history(matrix, features):
+    """
+    Value of each (indicator, ticker, window) feature at every date of a
+    PriceMatrix, one vectorized series call per (indicator, window).
+    Dates where a feature is not available (short history, missing close,
+    unknown ticker) are NaN.
+
+    Returns: float array of shape (len(matrix.dates), len(features))
+    """
+    out = np.full((len(matrix.dates), len(features)), np.nan)
+
+    groups = {}
+    for column, (name, ticker, window) in enumerate(features):
+        if ticker in matrix:
+            groups.setdefault((name, window), []).append((column, matrix.index[ticker]))
+
+    for (name, window), members in groups.items():
+        columns = [column for column, _ in members]
+        rows = [row for _, row in members]
+        out[:, columns] = INDICATORS[name]['series'](matrix.closes[rows], window).T
+
+    return out
+
+
+def test_rsi_batch(trials=200, seed=0):
+    """
+    Randomized check that calculate_rsi_batch() returns exactly (bit for
+    bit) what calculate_rsi_sma() gives on each ticker's closes.
+
+    Each trial builds a PriceMatrix of random walks with ragged starts
+    (left NaN padding), gaps in the middle, flat stretches and histories
+    shorter than the window, and compares every (ticker, window) pair.
+
+    Returns: number of mismatching pairs (0 when identical)
+    """
+    from price_matrix import PriceMatrix
+
+    print("\n" + "="*80)
+    print("UNIT TEST: Batched RSI vs calculate_rsi_sma()")
+    print("="*80)
+
+    rng = np.random.default_rng(seed)
+    mismatches = 0
+    compared = 0
+    for _ in range(trials):
+        tickers = [f"T{i}" for i in range(rng.integers(1, 12))]
+        days = int(rng.integers(2, 90))
+        closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (len(tickers), days)), axis=1))
+        closes[rng.random(closes.shape) < 0.1] = closes[0, 0]   # repeated closes
+        for row in range(len(tickers)):
+            closes[row, :rng.integers(0, days)] = np.nan          # ragged start
+            if rng.random() < 0.3:
+                closes[row, rng.random(days) < 0.1] = np.nan      # gaps
+        matrix = PriceMatrix(tickers, np.arange(days).astype('datetime64[D]'), closes)
+
+        pairs = [(ticker, int(window)) for ticker in tickers for window in rng.integers(1, 60, 3)]
+        batch = calculate_rsi_batch(matrix, pairs)
+        for ticker, window in pairs:
+            expected = calculate_rsi_sma(matrix.series(ticker), window)
+            compared += 1
+            if batch[(ticker, window)] != expected:
+                mismatches += 1
+                if mismatches <= 5:
+                    print(f"❌ {ticker} RSI({window}): batch {batch[(ticker, window)]}, reference {expected}")
+
+    print(f"Pairs compared: {compared}, mismatches: {mismatches}")
+    print("✓ Bit-identical" if mismatches == 0 else "❌ Batched RSI differs from calculate_rsi_sma()")
+    print("="*80 + "\n")
+    return mismatches
+
+
+if __name__ == "__main__":
+    sys.exit(1 if test_rsi_batch() else 0)
@@ -40,7 +40,7 @@ def lambda_handler(event, context):
 
     try:
         # Run the trading algorithm
-        result = main()
+        result = main(context)
 
         return {
             'statusCode': 200,
@@ -53,8 +53,8 @@ def lambda_handler(event, context):
     except Exception as e:
         # RE-RAISE. Returning a 500 *inside the body* is still a SUCCESSFUL Lambda
         # invocation, so AWS/Lambda `Errors` stays 0.0 and any alarm built on it is
-        # blind. The only error ever recorded for this function got through solely
-        # because download_data() calls exit(1) and SystemExit bypasses `except
-        # Exception`. Let AWS see real failures.
+        # blind. download_data() raises DataAcquisitionError (it used to call
+        # exit(1), and SystemExit bypassed `except Exception`). Let AWS see real
+        # failures.
         print(f"Error executing trading algorithm: {str(e)}")
         raise
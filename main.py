@@ -1,11 +1,21 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, wait, TimeoutError as FuturesTimeout
+import functools
 import os
+import random
+import time
 import requests
 import pytz
-from state_manager import read_state, write_state
+from state_manager import read_state, write_state, read_price_snapshot, write_price_snapshot
+from price_cache import load_bars, save_bars, merge_delta
+from data_provider import get_provider
+from price_matrix import PriceMatrix
+from indicators import calculate_rsi_sma, IndicatorEngine, INDICATORS
+from strategy import DEFAULT_STRATEGY_FILE, StrategyError, get_strategy
+from decision_engine import is_rank_node
+from triggers import build_trigger_table, crossed_triggers
 
 
 def should_notify(current_signal, last_state):
@@ -59,9 +69,10 @@ def send_telegram_message(message, bot_token, chat_id):
         print(f"⚠️  Telegram send failed: {str(e)}")
         return False
 
-def format_telegram_report(final_decision, rsi_cache, decision_path):
+def format_telegram_report(final_decision, rsi_cache, decision_path, strategy_name=None):
     """
     Format trading signal, decision path, and key RSI values for Telegram.
+    strategy_name, if given, is shown in the title (multi-strategy runs).
     Returns formatted message string.
     """
     # Convert UTC to Eastern Time
@@ -83,7 +94,7 @@ def format_telegram_report(final_decision, rsi_cache, decision_path):
         emoji = "✅" if result else "❌"
 
         # Format the condition
-        condition = f"{ticker} RSI({window}) {operator} {threshold}"
+        condition = f"{ticker} {step.get('indicator', 'RSI')}({window}) {operator} {threshold}"
         path_lines.append(f"{emoji} {condition} → {result} ({current_rsi:.1f})")
 
     decision_path_text = "\n".join(path_lines)
@@ -108,7 +119,9 @@ def format_telegram_report(final_decision, rsi_cache, decision_path):
     # Detect source: AWS Lambda or GitHub Actions
     source = "☁️ AWS Lambda" if os.environ.get('AWS_LAMBDA_FUNCTION_NAME') else "🔧 GitHub Actions"
 
-    message = f"""🎯 TRADING SIGNAL
+    title = f"🎯 TRADING SIGNAL: {strategy_name}" if strategy_name else "🎯 TRADING SIGNAL"
+
+    message = f"""{title}
 ━━━━━━━━━━━━━━━━
 {signal_emoji} {final_decision}
 
@@ -124,49 +137,171 @@ def format_telegram_report(final_decision, rsi_cache, decision_path):
 
     return message
 
-# List of tickers to download
+# Tickers always downloaded (and shown in the RSI overview); required_rows()
+# adds any other ticker a strategy reads
 TICKERS = ['QQQ', 'VIXY', 'SPY', 'IOO', 'XLP', 'VTV', 'XLF', 'VOX',
            'CURE', 'RETL', 'LABU', 'SOXL', 'FNGU', 'TQQQ', 'TECL', 'UPRO']
 
-# Global storage for data and RSI values
-ticker_data = {}
-rsi_cache = {}
+# Extra calendar days requested on top of the trading days a ticker needs,
+# to ride out market holidays
+LOOKBACK_BUFFER_DAYS = 10
 
-def calculate_rsi_sma(prices, window=9):
-    """
-    Calculate RSI using Simple Moving Average (SMA) method.
-    This matches the Google Sheet calculation.
+# Network budget for data acquisition
+REQUEST_TIMEOUT = 10         # seconds per HTTP request
+MAX_RETRIES = 2              # extra attempts per ticker after the first
+RETRY_BACKOFF = 1.0          # base seconds, doubled per attempt and jittered
+MAX_WORKERS = 8              # bounded thread pool for per-ticker fetches
+STAGE_BUDGET = 60            # seconds for the whole stage outside Lambda
+RESERVED_SECONDS = 15        # Lambda time kept back for RSI, Telegram and state
+SNAPSHOT_MAX_AGE = 300       # seconds a shared price snapshot stays reusable
 
-    Formula:
-    1. Diff = Close - PrevClose
-    2. Up = Diff if > 0 else 0, Down = Abs(Diff) if < 0 else 0
-    3. AvgUp = SMA(Up, window), AvgDown = SMA(Down, window)
-    4. RS = AvgUp / AvgDown
-    5. RSI = 100 - (100 / (1 + RS))
+class DataAcquisitionError(Exception):
+    """Raised when some tickers could not be downloaded in time."""
+
+# Compute indicators only when the decision tree first reads them (on by
+# default in Lambda, where the Step 2 overview is rarely looked at)
+LAZY_INDICATORS = os.environ.get(
+    'LAZY_INDICATORS', '1' if os.environ.get('AWS_LAMBDA_FUNCTION_NAME') else '0') == '1'
+
+class LazyRSICache(dict):
+    """
+    (ticker, window) -> RSI mapping that computes a missing entry through
+    indicator_engine on first lookup and memoizes it.
+    get() returns the default for unavailable (None) values.
     """
-    if len(prices) < window + 1:
-        return None
 
-    # Calculate price differences
-    diffs = np.diff(prices)
+    def __missing__(self, key):
+        value = indicator_engine.get('rsi_sma', *key)
+        self[key] = value
+        return value
 
-    # Separate ups and downs
-    ups = np.where(diffs > 0, diffs, 0)
-    downs = np.where(diffs < 0, np.abs(diffs), 0)
+    def get(self, key, default=None):
+        value = self[key]
+        return default if value is None else value
 
-    # Calculate SMA of ups and downs (last 'window' values)
-    avg_up = np.mean(ups[-(window):])
-    avg_down = np.mean(downs[-(window):])
+# Start the decision tree while downloads are still arriving (off by default)
+STREAMING = os.environ.get('STREAMING', '0') == '1'
 
-    # Avoid division by zero
-    if avg_down == 0:
-        return 100.0
+# Skip the run when live quotes cross none of the trigger prices on the last
+# decision's path (on by default in Lambda, which runs every 10 minutes)
+TRIGGER_CHECK = os.environ.get(
+    'TRIGGER_CHECK', '1' if os.environ.get('AWS_LAMBDA_FUNCTION_NAME') else '0') == '1'
 
-    # Calculate RS and RSI
-    rs = avg_up / avg_down
-    rsi = 100 - (100 / (1 + rs))
+# Global storage for data and RSI values
+# price_matrix holds date-aligned closes for every downloaded ticker,
+# indicator_engine every indicator value computed from them
+price_matrix = PriceMatrix([], [], np.empty((0, 0)))
+indicator_engine = IndicatorEngine(price_matrix)
+rsi_cache = LazyRSICache()
+
+# The decision tree lives in a strategy file (strategies/default.json
+# unless STRATEGY_FILE says otherwise). Each node compares one indicator of
+# one ticker against a threshold; 'true'/'false' hold the next node ID or a
+# terminal signal. 'indicator' names an entry of indicators.INDICATORS
+# (default 'rsi_sma').
+# STRATEGY_FILES (comma-separated) runs several strategies off one download
+# and one indicator pass. STRATEGY is the first of STRATEGIES, LOGIC_TREE its
+# {id: node} dict and COMPILED_TREE its flattened form; refresh_strategies()
+# swaps them all when a file changes.
+STRATEGY_FILE = os.environ.get('STRATEGY_FILE', DEFAULT_STRATEGY_FILE)
+STRATEGY_FILES = [path.strip() for path in os.environ.get('STRATEGY_FILES', '').split(',')
+                  if path.strip()] or [STRATEGY_FILE]
+STRATEGIES = [get_strategy(path) for path in STRATEGY_FILES]
+STRATEGY = STRATEGIES[0]
+LOGIC_TREE = STRATEGY.tree
+
+# Indicators read outside LOGIC_TREE: the RSI(9) overview of every ticker
+# printed in Step 2 and the Telegram report
+EXTRA_REQUIREMENTS = (
+    [('rsi_sma', ticker, 9) for ticker in TICKERS]
+    + [('rsi_sma', 'VIXY', 50)]
+)
+
+def node_requirements(node):
+    """The (indicator, ticker, window) a LOGIC_TREE node reads: one per ticker of a rank node."""
+    tickers = node['tickers'] if is_rank_node(node) else [node['ticker']]
+    return [(node.get('indicator', 'rsi_sma'), ticker, node['window']) for ticker in tickers]
+
+def indicator_requirements():
+    """
+    Every unique (indicator, ticker, window) the run needs, in first-use
+    order: the EXTRA_REQUIREMENTS, then each node's of every strategy.
+    """
+    requirements = list(EXTRA_REQUIREMENTS)
+    requirements += [requirement for strategy in STRATEGIES
+                     for node in strategy.tree.values() for requirement in node_requirements(node)]
+    return list(dict.fromkeys(requirements))
 
-    return rsi
+def required_rows():
+    """
+    Closes each ticker needs for the indicators it is read at, e.g. one more
+    than its largest RSI window. Its keys are the download universe: TICKERS
+    (through EXTRA_REQUIREMENTS) plus every other ticker a strategy reads.
+    Returns: dict of ticker -> rows
+    """
+    need = {}
+    for name, ticker, window in indicator_requirements():
+        need[ticker] = max(need.get(ticker, 0), INDICATORS[name]['rows'](window))
+    return need
+
+COMPILED_TREE = STRATEGY.compiled
+
+def check_strategies(strategies):
+    """
+    Make sure strategies can share one run: no two of them have the same
+    name (the key of their states and decisions in a run) or save their
+    state under the same key.
+    Raises: StrategyError
+    """
+    problems = []
+    names = [strategy.name for strategy in strategies]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        problems.append(f"Strategies share a name: {', '.join(duplicates)}")
+    keys = [strategy.state_key for strategy in strategies]
+    duplicates = sorted({str(key) for key in keys if keys.count(key) > 1})
+    if duplicates:
+        problems.append(f"Strategies share a state key: {', '.join(duplicates)}")
+    if problems:
+        raise StrategyError("\n".join(problems))
+
+check_strategies(STRATEGIES)
+
+def refresh_strategies():
+    """Reload any of STRATEGY_FILES that changed since the last run (warm Lambda containers)."""
+    global STRATEGIES, STRATEGY, LOGIC_TREE, COMPILED_TREE
+    strategies = [get_strategy(path) for path in STRATEGY_FILES]
+    check_strategies(strategies)
+    STRATEGIES = strategies
+    STRATEGY = STRATEGIES[0]
+    LOGIC_TREE = STRATEGY.tree
+    COMPILED_TREE = STRATEGY.compiled
+
+def ticker_priority():
+    """
+    Tickers in the order the decision trees can reach them: breadth-first
+    from each strategy's root, so the ones on every path (QQQ, VIXY, SPY)
+    come first, then those only rank nodes read, then the rest of the
+    download universe (see required_rows()).
+    """
+    order = []
+    for strategy in STRATEGIES:
+        queue = [strategy.root]
+        seen = set()
+        while queue:
+            node_id = queue.pop(0)
+            if node_id in seen or node_id not in strategy.tree:
+                continue
+            seen.add(node_id)
+            node = strategy.tree[node_id]
+            order += [ticker for _, ticker, _ in node_requirements(node)]
+            if not is_rank_node(node):
+                queue += [child for child in (node['true'], node['false']) if isinstance(child, int)]
+    return list(dict.fromkeys(order + list(required_rows())))
+
+def lookback_days(rows):
+    """Calendar days to request so that at least `rows` trading days come back."""
+    return int(np.ceil(rows * 7 / 5)) + LOOKBACK_BUFFER_DAYS
 
 def test_rsi_calculation():
     """
@@ -191,409 +326,510 @@ def test_rsi_calculation():
 
     return rsi_result
 
-def download_data():
+def _fetch_batched(provider, tickers, start_date, end_date, deadline):
+    """Fetch a group of tickers in one grouped request."""
+    # Printed as one line once finished, since groups are fetched in parallel
+    message = f"Fetching {len(tickers)} tickers from {start_date.date()} in one batched request..."
+    if time.monotonic() >= deadline:
+        print(f"{message} ⏱ Missed stage deadline")
+        return {ticker: pd.DataFrame() for ticker in tickers}
+    try:
+        frames = provider.fetch_batch(tickers, start_date, end_date, timeout=REQUEST_TIMEOUT)
+    except Exception as e:
+        print(f"{message} ❌ FAILED - Error: {str(e)}")
+        return {ticker: pd.DataFrame() for ticker in tickers}
+    print(f"{message} done")
+    return frames
+
+def _fetch_one(provider, ticker, start_date, end_date, deadline):
+    """
+    Fetch a single ticker, retrying with jittered exponential backoff until
+    the retry budget or the stage deadline runs out.
+    """
+    last_error = "no data returned"
+    attempts = 0
+    for attempt in range(MAX_RETRIES + 1):
+        if attempt:
+            delay = RETRY_BACKOFF * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+            if time.monotonic() + delay >= deadline:
+                break
+            time.sleep(delay)
+        attempts += 1
+        try:
+            df = provider.fetch_one(ticker, start_date, end_date, timeout=REQUEST_TIMEOUT)
+            if not df.empty:
+                return df
+        except Exception as e:
+            last_error = str(e)
+    raise DataAcquisitionError(f"{ticker}: {last_error} (after {attempts} attempt{'s' if attempts != 1 else ''})")
+
+def _fetch_concurrent(provider, tickers, start_date, end_date, deadline):
+    """
+    Fetch each ticker with its own request on a bounded thread pool.
+    Tickers still outstanding at the deadline are abandoned and reported.
+    """
+    frames = {ticker: pd.DataFrame() for ticker in tickers}
+
+    executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+    futures = {executor.submit(_fetch_one, provider, ticker, start_date, end_date, deadline): ticker
+               for ticker in tickers}
+    done, not_done = wait(futures, timeout=max(deadline - time.monotonic(), 0))
+    # Don't block on stragglers; their per-request timeout ends them shortly
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    # One block once finished, since groups are fetched in parallel
+    lines = [f"Fetching {len(tickers)} tickers from {start_date.date()} on {MAX_WORKERS} threads... done"]
+    for future in done:
+        try:
+            frames[futures[future]] = future.result()
+        except Exception as e:
+            lines.append(f"  ❌ FAILED - {str(e)}")
+
+    if not_done:
+        missed = sorted(futures[future] for future in not_done)
+        lines.append(f"  ⏱ Missed stage deadline: {', '.join(missed)}")
+    print("\n".join(lines))
+
+    return frames
+
+def stage_deadline(context=None):
+    """
+    Monotonic deadline for data acquisition.
+    Inside Lambda it is taken from the invocation's remaining time, minus
+    what the later steps need; elsewhere a fixed budget applies.
+    """
+    if context is not None:
+        budget = context.get_remaining_time_in_millis() / 1000.0 - RESERVED_SECONDS
+    else:
+        budget = STAGE_BUDGET
+    return time.monotonic() + max(budget, 1.0)
+
+def _today_et():
+    """Today's date in Eastern Time, as a naive midnight Timestamp."""
+    et_tz = pytz.timezone('America/New_York')
+    return pd.Timestamp(datetime.now(pytz.UTC).astimezone(et_tz).date())
+
+def _fetch_grouped(fetch, starts, end_date):
+    """
+    Fetch tickers grouped by the date their request has to start from, so
+    tickers sharing a start still go out in one batched request. The
+    groups are requested at the same time, so the stage takes one
+    round-trip however many distinct lookbacks the strategies need.
+    Returns: dict of ticker -> DataFrame
+    """
+    groups = {}
+    for ticker, start in starts.items():
+        groups.setdefault(start, []).append(ticker)
+
+    if len(groups) <= 1:
+        return fetch(*groups.popitem(), end_date) if groups else {}
+
+    frames = {}
+    with ThreadPoolExecutor(max_workers=len(groups)) as executor:
+        futures = [executor.submit(fetch, tickers, start, end_date)
+                   for start, tickers in sorted(groups.items())]
+        for future in futures:
+            frames.update(future.result())
+    return frames
+
+def _fetch_with_cache(fetch, starts, rows, end_date):
+    """
+    Serve settled bars from the on-disk cache and fetch only newer ones.
+
+    Cached tickers are requested from their watermark (last cached bar) so
+    the overlapping bar can be checked for revisions; uncached tickers, and
+    tickers whose cache is shorter than `rows` needs, get their full window.
+    A revised ticker has its whole history re-fetched.
+    Only settled bars (before today ET) are written back to the cache.
+    Returns: dict of ticker -> DataFrame
+    """
+    cached = {}
+    for ticker in starts:
+        bars = load_bars(ticker)
+        cached[ticker] = bars if bars is not None and len(bars) >= rows[ticker] else None
+
+    frames = _fetch_grouped(fetch, {
+        ticker: bars.index[-1].to_pydatetime() if bars is not None else starts[ticker]
+        for ticker, bars in cached.items()
+    }, end_date)
+
+    revised = []
+    for ticker, bars in cached.items():
+        delta = frames.get(ticker, pd.DataFrame())
+        if bars is None or delta.empty:
+            continue
+        merged, was_revised = merge_delta(bars, delta)
+        if was_revised:
+            revised.append(ticker)
+        else:
+            frames[ticker] = merged
+
+    if revised:
+        print(f"↻ Cached history revised for {', '.join(revised)} - re-fetching full window")
+        frames.update(_fetch_grouped(fetch, {ticker: starts[ticker] for ticker in revised}, end_date))
+
+    today = _today_et()
+    for ticker, df in frames.items():
+        if not df.empty:
+            # Trim to the lookback window so the cache does not grow forever
+            frames[ticker] = df = df[df.index >= pd.Timestamp(starts[ticker].date())]
+            save_bars(ticker, df[df.index < today], synced_on=today.strftime('%Y-%m-%d'))
+
+    print()
+    return frames
+
+def _fetch_intraday(provider, rows, deadline, quotes=None):
+    """
+    Fast path once the day's settled closes are cached.
+
+    If every ticker's cache was fully synced earlier today, the history is
+    already final up to yesterday and only today's partial bar can change.
+    One quote request fetches the latest trade price of every ticker, which
+    is spliced in as the provisional last close. Tickers already in
+    `quotes` ({ticker: (timestamp, price)}, e.g. from check_triggers()) are
+    not requested again.
+    Returns: dict of ticker -> DataFrame, or None when the fast path does
+    not apply (the caller then does a regular fetch)
+    """
+    today = _today_et()
+    cached = {}
+    for ticker in rows:
+        bars = load_bars(ticker)
+        if bars is None or bars.attrs.get('synced_on') != today.strftime('%Y-%m-%d') \
+                or len(bars) + 1 < rows[ticker]:
+            return None
+        cached[ticker] = bars
+
+    if time.monotonic() >= deadline:
+        return None
+
+    quotes = dict(quotes or {})
+    needed = [ticker for ticker in rows if ticker not in quotes]
+    print(f"Fetching live quotes for {len(needed)} tickers in one request...", end=" ")
+    try:
+        if needed:
+            quotes.update(provider.fetch_quotes(needed, timeout=REQUEST_TIMEOUT))
+    except Exception as e:
+        print(f"❌ FAILED - Error: {str(e)}")
+        return None
+
+    # A quote from an earlier session (holiday, halted ticker) is not today's bar
+    stale = [ticker for ticker in rows
+             if ticker not in quotes or quotes[ticker][0].normalize() != today]
+    if stale:
+        print(f"⚠️  no quote from today for {', '.join(stale)} - falling back to a full fetch")
+        return None
+    print("done\n")
+
+    frames = {}
+    for ticker in rows:
+        live_bar = pd.DataFrame({'Close': [quotes[ticker][1]]},
+                                index=pd.DatetimeIndex([today], name='Date'))
+        frames[ticker] = pd.concat([cached[ticker], live_bar])
+    return frames
+
+def _load_shared_snapshot(rows):
+    """
+    Reuse the price snapshot published by the other runner (Lambda or
+    GitHub Actions) if it is fresh and covers every ticker's history.
+    Returns: PriceMatrix, or None
+    """
+    payload = read_price_snapshot()
+    if payload is None:
+        return None
+
+    try:
+        matrix, meta = PriceMatrix.from_bytes(payload)
+    except Exception as e:
+        print(f"⚠️  Could not parse price snapshot: {e}")
+        return None
+
+    age = time.time() - meta.get('published_at', 0)
+    if age > SNAPSHOT_MAX_AGE:
+        return None
+    if any(ticker not in matrix or len(matrix.series(ticker)) < rows[ticker] for ticker in rows):
+        return None
+
+    print(f"✓ Reusing price snapshot published {age:.0f}s ago by {meta.get('source', 'unknown')}\n")
+    return matrix
+
+def _publish_shared_snapshot(matrix):
+    """Publish this run's closes for the other runner to reuse."""
+    source = 'AWS Lambda' if os.environ.get('AWS_LAMBDA_FUNCTION_NAME') else 'GitHub Actions'
+    write_price_snapshot(matrix.to_bytes(published_at=time.time(), source=source))
+
+def download_data(batched=True, deadline=None, provider=None, intraday=True, quotes=None):
     """
     Step 1: Data Acquisition & Verification
-    Downloads at least 3 months of OHLCV data for all tickers.
+    Downloads the daily history each ticker needs for its RSI windows.
+
+    Each ticker's lookback is sized from required_rows(), so only VIXY pulls
+    the long history RSI(50)/RSI(60) need. By default tickers are fetched in
+    grouped requests (one per distinct start date) and split into per-ticker
+    frames; pass batched=False to fetch one request per ticker on a bounded
+    thread pool with retries. Either way the stage stops at `deadline` (see
+    stage_deadline()). Bars come from `provider` (see
+    data_provider.get_provider()). Settled bars from cacheable providers are
+    cached on disk, so after the first run only bars newer than the cached
+    watermark are requested. With `intraday` set, later runs on the same day
+    skip history entirely and splice one live quote per ticker onto the
+    cached closes (see _fetch_intraday()). Cacheable runs also share their
+    closes through a snapshot in the state store; a snapshot younger than
+    SNAPSHOT_MAX_AGE is reused instead of fetching anything, unless `quotes`
+    is given: live quotes check_triggers() fetched after a trigger crossed,
+    which the snapshot may predate. Those quotes are then reused by the
+    intraday path. Every ticker is checked before stopping, so the report
+    lists exactly which symbols came back short.
     """
     print("\n" + "="*80)
     print("STEP 1: DATA ACQUISITION & VERIFICATION")
     print("="*80 + "\n")
 
-    # Calculate date range (3 months back, using 120 days to ensure coverage)
+    rows = required_rows()
     end_date = datetime.now()
-    start_date = end_date - timedelta(days=120)
-
-    print(f"Downloading data from {start_date.date()} to {end_date.date()}\n")
-
-    all_success = True
-
-    for ticker in TICKERS:
-        try:
-            print(f"Fetching {ticker}...", end=" ")
-            df = yf.download(ticker, start=start_date, end=end_date, progress=False)
-
-            if df.empty or len(df) < 60:  # Need at least 60 days for calculations
-                print(f"❌ FAILED - Insufficient data (only {len(df)} rows)")
-                all_success = False
-                continue
+    starts = {ticker: end_date - timedelta(days=lookback_days(rows[ticker])) for ticker in rows}
+
+    print(f"Downloading data from {min(starts.values()).date()} to {end_date.date()}\n")
+
+    if deadline is None:
+        deadline = stage_deadline()
+    if provider is None:
+        provider = get_provider()
+
+    global price_matrix
+    matrix = _load_shared_snapshot(rows) if provider.cacheable and quotes is None else None
+    fetched = matrix is None
+
+    if fetched:
+        fetch = functools.partial(_fetch_batched if batched else _fetch_concurrent, provider,
+                                  deadline=deadline)
+        frames = None
+        if provider.cacheable and intraday:
+            frames = _fetch_intraday(provider, rows, deadline, quotes)
+        if frames is None and provider.cacheable:
+            frames = _fetch_with_cache(fetch, starts, rows, end_date)
+        elif frames is None:
+            frames = _fetch_grouped(fetch, starts, end_date)
+            print()
+
+        # Keep only closes, aligned by date, for the rest of the pipeline
+        matrix = PriceMatrix.from_frames({ticker: df for ticker, df in frames.items() if not df.empty})
+
+    short_tickers = []
+
+    for ticker in rows:
+        count = len(matrix.series(ticker)) if ticker in matrix else 0
+
+        if count < rows[ticker]:
+            print(f"{ticker:6s} ❌ FAILED - Insufficient data (only {count} of {rows[ticker]} rows)")
+            short_tickers.append(ticker)
+            continue
 
-            ticker_data[ticker] = df
-            last_date = df.index[-1].strftime('%Y-%m-%d')
+        print(f"{ticker:6s} ✓ Data Check: Successfully downloaded {count} rows. Last date: {matrix.last_date(ticker)}")
 
-            print(f"✓ Data Check: Successfully downloaded {len(df)} rows. Last date: {last_date}")
+    price_matrix = matrix
 
-        except Exception as e:
-            print(f"❌ FAILED - Error: {str(e)}")
-            all_success = False
+    if fetched and provider.cacheable and not short_tickers:
+        print()
+        _publish_shared_snapshot(matrix)
 
     print("\n" + "="*80)
 
-    if not all_success:
-        print("\n❌ DATA ACQUISITION FAILED - Some tickers could not be downloaded!")
+    if short_tickers:
+        print(f"\n❌ DATA ACQUISITION FAILED - {len(short_tickers)} of {len(rows)} tickers came back short!")
+        print(f"Short tickers: {', '.join(short_tickers)}")
         print("Script will now stop. Please check the failed tickers and try again.")
         print("="*80 + "\n")
-        exit(1)
+        raise DataAcquisitionError(f"Could not download: {', '.join(short_tickers)}")
     else:
         print("\n✓ All tickers downloaded successfully!")
         print("="*80 + "\n")
 
-def calculate_all_rsi():
+class StreamingPrices:
     """
-    Step 2: Math Calculation & Verification
-    Calculates RSI for all tickers with various windows.
+    Price source fed by per-ticker downloads running in the background.
+
+    Downloads are queued on a bounded thread pool in ticker_priority() order.
+    series(ticker) blocks only until that one ticker's bars have arrived, so
+    an IndicatorEngine over this source lets the decision tree start as soon
+    as the tickers on its path are in, instead of after the whole universe.
+    A ticker that failed, came back short or missed the deadline raises
+    DataAcquisitionError when it is read, and only then.
     """
-    print("\n" + "="*80)
-    print("STEP 2: MATH CALCULATION & VERIFICATION")
-    print("="*80 + "\n")
-
-    # Standard RSI calculations with 9-day window
-    for ticker in TICKERS:
-        if ticker not in ticker_data:
-            continue
 
-        df = ticker_data[ticker]
+    def __init__(self, provider, starts, end_date, rows, deadline):
+        self.rows = rows
+        self.deadline = deadline
+        self._closes = {}
+        self._started = time.monotonic()
+        self._executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+        self._futures = {
+            ticker: self._executor.submit(self._fetch, provider, ticker, starts[ticker], end_date)
+            for ticker in ticker_priority() if ticker in starts
+        }
 
-        # Handle multi-level columns from yfinance and extract Close prices
-        if isinstance(df.columns, pd.MultiIndex):
-            prices = df['Close'].iloc[:, 0].values
-        else:
-            prices = df['Close'].values
+    def _fetch(self, provider, ticker, start_date, end_date):
+        df = _fetch_one(provider, ticker, start_date, end_date, self.deadline)
+        close = df['Close']
+        if isinstance(close, pd.DataFrame):
+            close = close.iloc[:, 0]
+        closes = close.to_numpy(dtype=np.float64)
+        return closes[~np.isnan(closes)]
+
+    def __contains__(self, ticker):
+        return ticker in self._futures
+
+    def series(self, ticker):
+        """A ticker's closes, waiting for its download if needed."""
+        if ticker not in self._closes:
+            waited = time.monotonic()
+            try:
+                closes = self._futures[ticker].result(timeout=max(self.deadline - time.monotonic(), 0))
+            except FuturesTimeout:
+                raise DataAcquisitionError(f"{ticker}: missed stage deadline")
+            if len(closes) < self.rows[ticker]:
+                raise DataAcquisitionError(f"{ticker}: only {len(closes)} of {self.rows[ticker]} rows")
+            print(f"  ⇣ {ticker} ready ({len(closes)} rows, "
+                  f"{time.monotonic() - self._started:.2f}s in, waited {time.monotonic() - waited:.2f}s)")
+            self._closes[ticker] = closes
+        return self._closes[ticker]
+
+    def close(self):
+        """Drop downloads nobody read. Returns the tickers that were never needed."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        return [ticker for ticker in self._futures if ticker not in self._closes]
+
+def stream_data(deadline=None, provider=None):
+    """
+    Step 1 (streaming mode): start every ticker's download in the background
+    and return a StreamingPrices source right away. Nothing is cached or
+    shared in this mode; each ticker is fetched for its own lookback.
+    """
+    print("\n" + "="*80)
+    print("STEP 1: DATA ACQUISITION (STREAMING)")
+    print("="*80 + "\n")
 
-        # Remove any NaN values
-        prices = prices[~np.isnan(prices)]
+    if deadline is None:
+        deadline = stage_deadline()
+    if provider is None:
+        provider = get_provider()
 
-        # Default 9-day RSI
-        rsi_9 = calculate_rsi_sma(prices, window=9)
-        rsi_cache[(ticker, 9)] = rsi_9
+    rows = required_rows()
+    end_date = datetime.now()
+    starts = {ticker: end_date - timedelta(days=lookback_days(rows[ticker])) for ticker in rows}
 
-        print(f"{ticker:6s} - RSI(9):  {rsi_9:.2f}")
+    prices = StreamingPrices(provider, starts, end_date, rows, deadline)
+    print(f"Queued {len(starts)} downloads on {MAX_WORKERS} threads, in order: {', '.join(ticker_priority())}")
+    print("\n" + "="*80 + "\n")
+    return prices
 
-    # Special calculations for VIXY (windows 50 and 60)
-    if 'VIXY' in ticker_data:
-        df = ticker_data['VIXY']
+def calculate_all_rsi(lazy=False, prices=None):
+    """
+    Step 2: Math Calculation & Verification
+    Calculates every indicator in indicator_requirements().
 
-        # Handle multi-level columns from yfinance
-        if isinstance(df.columns, pd.MultiIndex):
-            prices = df['Close'].iloc[:, 0].values
-        else:
-            prices = df['Close'].values
+    With lazy=True nothing is computed up front: get_rsi() and
+    get_indicator() compute and memoize each value the first time the
+    decision tree (or the report) reads it, so an early exit at node 2 or 4
+    skips most of the math. `prices` overrides the price source (default:
+    price_matrix), e.g. with the StreamingPrices from stream_data().
+    """
+    print("\n" + "="*80)
+    print("STEP 2: MATH CALCULATION & VERIFICATION")
+    print("="*80 + "\n")
 
-        # Remove any NaN values
-        prices = prices[~np.isnan(prices)]
+    global indicator_engine
+    indicator_engine = IndicatorEngine(prices if prices is not None else price_matrix)
+    rsi_cache.clear()
 
-        rsi_50 = calculate_rsi_sma(prices, window=50)
-        rsi_60 = calculate_rsi_sma(prices, window=60)
+    if lazy:
+        print("⏳ On-demand mode: indicators are computed when the decision tree first reads them")
+        print("\n" + "="*80 + "\n")
+        return
 
-        rsi_cache[('VIXY', 50)] = rsi_50
-        rsi_cache[('VIXY', 60)] = rsi_60
+    # Every indicator the trees, rank nodes and report declare, each
+    # computed once (all RSIs in one batched pass over the price matrix)
+    values = indicator_engine.compute(indicator_requirements())
 
-        print(f"\nVIXY   - RSI(50): {rsi_50:.2f}")
-        print(f"VIXY   - RSI(60): {rsi_60:.2f}")
+    for (name, ticker, window), value in values.items():
+        if name == 'rsi_sma':
+            rsi_cache[(ticker, window)] = value
+        label = f"{ticker:6s} - {INDICATORS[name]['label']}({window}):"
+        print(f"{label:18s}{value:.2f}" if value is not None else f"{label:18s}n/a")
 
     print("\n" + "="*80)
     print("✓ All RSI calculations completed!")
     print("="*80 + "\n")
 
 def get_rsi(ticker, window=9):
-    """Helper function to get cached RSI value."""
+    """Helper function to get cached RSI value (computed on first use)."""
     return rsi_cache.get((ticker, window), 0)
 
-def execute_logic():
+def get_indicator(name, ticker, window):
+    """Helper function to get an indicator value (0 if unavailable)."""
+    if name == 'rsi_sma':
+        return get_rsi(ticker, window)
+    value = indicator_engine.get(name, ticker, window)
+    return value if value is not None else 0
+
+def execute_logic(strategy=None):
     """
     Step 3: Logic Execution (The Decision Tree)
     Traverses the decision tree based on RSI conditions.
+
+    Args:
+        strategy: Strategy whose tree to walk (default: STRATEGY)
     Returns: (final_decision, decision_path)
     """
+    strategy = strategy or STRATEGY
+
     print("\n" + "="*80)
     print("STEP 3: LOGIC EXECUTION (DECISION TREE)")
     print("="*80 + "\n")
+    if len(STRATEGIES) > 1:
+        print(f"Strategy: {strategy.name}\n")
 
     decision_path = []
+    tree = strategy.compiled
 
-    # Define the logic tree as a dictionary
-    logic_tree = {
-        1: {
-            'condition': lambda: get_rsi('QQQ', 9) > 79,
-            'ticker': 'QQQ',
-            'window': 9,
-            'threshold': 79,
-            'operator': '>',
-            'true': 2,
-            'false': 3
-        },
-        2: {
-            'condition': lambda: get_rsi('VIXY', 50) > 40,
-            'ticker': 'VIXY',
-            'window': 50,
-            'threshold': 40,
-            'operator': '>',
-            'true': "1.5x VIX Group (VXX, UVIX)",
-            'false': 4
-        },
-        3: {
-            'condition': lambda: get_rsi('SPY', 9) > 79,
-            'ticker': 'SPY',
-            'window': 9,
-            'threshold': 79,
-            'operator': '>',
-            'true': 5,
-            'false': 8
-        },
-        4: {
-            'condition': lambda: get_rsi('SPY', 9) > 82.5,
-            'ticker': 'SPY',
-            'window': 9,
-            'threshold': 82.5,
-            'operator': '>',
-            'true': "1.5x VIX Group (VXX, UVIX)",
-            'false': "VIX Blend (VXX=0.45, VIXM=0.2, UVIX=0.35)"
-        },
-        5: {
-            'condition': lambda: get_rsi('VIXY', 60) > 40,
-            'ticker': 'VIXY',
-            'window': 60,
-            'threshold': 40,
-            'operator': '>',
-            'true': "1.5x VIX Group (VXX, UVIX)",
-            'false': 6
-        },
-        6: {
-            'condition': lambda: get_rsi('QQQ', 9) > 82.5,
-            'ticker': 'QQQ',
-            'window': 9,
-            'threshold': 82.5,
-            'operator': '>',
-            'true': "1.5x VIX Group (VXX, UVIX)",
-            'false': "VIX Blend (VXX=0.45, VIXM=0.2, UVIX=0.35)"
-        },
-        8: {
-            'condition': lambda: get_rsi('IOO', 9) > 80,
-            'ticker': 'IOO',
-            'window': 9,
-            'threshold': 80,
-            'operator': '>',
-            'true': 9,
-            'false': 12
-        },
-        9: {
-            'condition': lambda: get_rsi('VIXY', 60) > 40,
-            'ticker': 'VIXY',
-            'window': 60,
-            'threshold': 40,
-            'operator': '>',
-            'true': "1.5x VIX Group (VXX, UVIX)",
-            'false': 10
-        },
-        10: {
-            'condition': lambda: get_rsi('IOO', 9) > 82.5,
-            'ticker': 'IOO',
-            'window': 9,
-            'threshold': 82.5,
-            'operator': '>',
-            'true': "1.5x VIX Group (VXX, UVIX)",
-            'false': "1x VIX (VIXY)"
-        },
-        12: {
-            'condition': lambda: get_rsi('XLP', 9) > 77,
-            'ticker': 'XLP',
-            'window': 9,
-            'threshold': 77,
-            'operator': '>',
-            'true': 13,
-            'false': 16
-        },
-        13: {
-            'condition': lambda: get_rsi('XLP', 9) > 82.5,
-            'ticker': 'XLP',
-            'window': 9,
-            'threshold': 82.5,
-            'operator': '>',
-            'true': "1.5x VIX Group (VXX, UVIX)",
-            'false': "1x VIX (VIXY)"
-        },
-        16: {
-            'condition': lambda: get_rsi('VTV', 9) > 79,
-            'ticker': 'VTV',
-            'window': 9,
-            'threshold': 79,
-            'operator': '>',
-            'true': 17,
-            'false': 18
-        },
-        17: {
-            'condition': lambda: get_rsi('VTV', 9) > 82.5,
-            'ticker': 'VTV',
-            'window': 9,
-            'threshold': 82.5,
-            'operator': '>',
-            'true': "1.5x VIX Group (VXX, UVIX)",
-            'false': "1x VIX (VIXY)"
-        },
-        18: {
-            'condition': lambda: get_rsi('XLF', 9) > 81,
-            'ticker': 'XLF',
-            'window': 9,
-            'threshold': 81,
-            'operator': '>',
-            'true': 19,
-            'false': 22
-        },
-        19: {
-            'condition': lambda: get_rsi('XLF', 9) > 85,
-            'ticker': 'XLF',
-            'window': 9,
-            'threshold': 85,
-            'operator': '>',
-            'true': "1.5x VIX Group (VXX, UVIX)",
-            'false': "1x VIX (VIXY)"
-        },
-        22: {
-            'condition': lambda: get_rsi('VOX', 9) > 79,
-            'ticker': 'VOX',
-            'window': 9,
-            'threshold': 79,
-            'operator': '>',
-            'true': 23,
-            'false': 24
-        },
-        23: {
-            'condition': lambda: get_rsi('VOX', 9) > 82.5,
-            'ticker': 'VOX',
-            'window': 9,
-            'threshold': 82.5,
-            'operator': '>',
-            'true': "1.5x VIX Group (VXX, UVIX)",
-            'false': "1x VIX (VIXY)"
-        },
-        24: {
-            'condition': lambda: get_rsi('CURE', 9) > 82,
-            'ticker': 'CURE',
-            'window': 9,
-            'threshold': 82,
-            'operator': '>',
-            'true': 25,
-            'false': 28
-        },
-        25: {
-            'condition': lambda: get_rsi('CURE', 9) > 85,
-            'ticker': 'CURE',
-            'window': 9,
-            'threshold': 85,
-            'operator': '>',
-            'true': "1.5x VIX Group (VXX, UVIX)",
-            'false': "1x VIX (VIXY)"
-        },
-        28: {
-            'condition': lambda: get_rsi('RETL', 9) > 82,
-            'ticker': 'RETL',
-            'window': 9,
-            'threshold': 82,
-            'operator': '>',
-            'true': 29,
-            'false': 32
-        },
-        29: {
-            'condition': lambda: get_rsi('RETL', 9) > 85,
-            'ticker': 'RETL',
-            'window': 9,
-            'threshold': 85,
-            'operator': '>',
-            'true': "1.5x VIX Group (VXX, UVIX)",
-            'false': "1x VIX (VIXY)"
-        },
-        32: {
-            'condition': lambda: get_rsi('LABU', 9) > 79,
-            'ticker': 'LABU',
-            'window': 9,
-            'threshold': 79,
-            'operator': '>',
-            'true': "LABD",
-            'false': 33
-        },
-        33: {
-            'condition': lambda: get_rsi('SOXL', 9) < 25,
-            'ticker': 'SOXL',
-            'window': 9,
-            'threshold': 25,
-            'operator': '<',
-            'true': "SOXL",
-            'false': 34
-        },
-        34: {
-            'condition': lambda: get_rsi('FNGU', 9) < 25,
-            'ticker': 'FNGU',
-            'window': 9,
-            'threshold': 25,
-            'operator': '<',
-            'true': "FNGU",
-            'false': 35
-        },
-        35: {
-            'condition': lambda: get_rsi('TQQQ', 9) < 28,
-            'ticker': 'TQQQ',
-            'window': 9,
-            'threshold': 28,
-            'operator': '<',
-            'true': 'SPECIAL_LOGIC',
-            'false': 36
-        },
-        36: {
-            'condition': lambda: get_rsi('TECL', 9) < 25,
-            'ticker': 'TECL',
-            'window': 9,
-            'threshold': 25,
-            'operator': '<',
-            'true': "TECL",
-            'false': 37
-        },
-        37: {
-            'condition': lambda: get_rsi('UPRO', 9) < 25,
-            'ticker': 'UPRO',
-            'window': 9,
-            'threshold': 25,
-            'operator': '<',
-            'true': "UPRO",
-            'false': "BIL (T-Bill ETF)"
-        }
-    }
-
-    # Start traversal at ID 1
-    current_id = 1
+    # Start traversal at the root (node 0 of the compiled tree)
+    node = 0
     step_count = 0
 
     while True:
         step_count += 1
-        node = logic_tree[current_id]
+        name, ticker, window = tree.features[tree.feature[node]]
+        spec = tree.nodes[node]
 
         # Evaluate condition
-        result = node['condition']()
-        current_rsi = get_rsi(node['ticker'], node['window'])
-        operator = node.get('operator', '>')
+        current_rsi = get_indicator(name, ticker, window)
+        result, next_node = tree.branch(node, current_rsi)
+        operator = spec.get('operator', '>')
+        label = INDICATORS[name]['label']
 
-        print(f"Step {step_count}: ID {current_id} ({node['ticker']} RSI({node['window']}) {operator} {node['threshold']}?) -> ", end="")
-        print(f"Result: {result} (Current RSI: {current_rsi:.2f})")
+        print(f"Step {step_count}: ID {tree.node_ids[node]} ({ticker} {label}({window}) {operator} {spec['threshold']}?) -> ", end="")
+        print(f"Result: {result} (Current {label}: {current_rsi:.2f})")
 
         # Record this step in decision path
         decision_path.append({
-            'ticker': node['ticker'],
-            'window': node['window'],
+            'indicator': label,
+            'ticker': ticker,
+            'window': window,
             'operator': operator,
-            'threshold': node['threshold'],
+            'threshold': spec['threshold'],
             'result': result,
-            'current_rsi': current_rsi
+            'current_rsi': current_rsi,
+            'id': tree.node_ids[node]
         })
 
-        # Determine next step
-        next_step = node['true'] if result else node['false']
-
         # Check if we've reached a terminal result
-        if isinstance(next_step, str):
-            if next_step == 'SPECIAL_LOGIC':
-                print(f"  → Executing Special Logic (ID 35)...")
-                final_result = execute_special_logic_35()
+        if next_node < 0:
+            leaf = ~next_node
+            if leaf in tree.ranks:
+                print(f"  → Ranking candidates (ID {tree.ranks[leaf]['id']})...")
+                final_result = execute_rank(tree, leaf)
             else:
-                final_result = next_step
+                final_result = tree.leaves[leaf]
 
             print("\n" + "="*80)
             print("✓ FINAL RESULT:")
@@ -601,69 +837,207 @@ def execute_logic():
             print("="*80 + "\n")
             return final_result, decision_path
         else:
-            print(f"  → Going to ID {next_step}\n")
-            current_id = next_step
+            print(f"  → Going to ID {tree.node_ids[next_node]}\n")
+            node = next_node
 
-def execute_special_logic_35():
+def execute_rank(tree, leaf):
     """
-    Step 4: Special Logic for ID 35
-    If RSI(TQQQ, 9) < 28 is TRUE:
-    1. Fetch current 9-day RSI for: SOXL, TECL, TQQQ, FNGU
-    2. Sort them ascending (lowest RSI first)
-    3. Result: "Buy [Name1] and [Name2] (Bottom 2 RSIs)"
+    Step 4: Rank node
+    Picks the k lowest ("bottom") or highest ("top") indicator values among
+    the node's tickers, e.g. the bottom 2 RSI(9) of SOXL, TECL, TQQQ and
+    FNGU. Ties keep the tickers' listed order.
+    Result: "Buy [Name1] and [Name2] (Bottom 2 RSIs: x, y)"
     """
+    spec = tree.ranks[leaf]
+    label = INDICATORS[spec['indicator']]['label']
+    direction = 'Top' if spec['largest'] else 'Bottom'
+
     print("\n" + "-"*80)
-    print("SPECIAL LOGIC (ID 35): Finding Bottom 2 RSIs")
+    print(f"RANK (ID {spec['id']}): Finding {direction} {spec['k']} {label}s "
+          f"of {len(spec['tickers'])} candidates")
+    print("-"*80 + "\n")
+
+    # The candidates' values, in feature-vector order, read through the
+    # shared indicator cache
+    values = [0.0] * len(tree.features)
+    for feature in spec['features']:
+        values[feature] = get_indicator(*tree.features[feature])
+
+    picks = [(spec['tickers'][i], values[spec['features'][i]]) for i in tree.rank(leaf, values)]
+
+    print(f"{direction} {spec['k']} {label}s:")
+    for rank, (ticker, value) in enumerate(picks, 1):
+        print(f"  {rank}. {ticker} ({label}: {value:.2f})")
     print("-"*80 + "\n")
 
-    tickers_to_check = ['SOXL', 'TECL', 'TQQQ', 'FNGU']
-    rsi_values = []
+    names = [ticker for ticker, _ in picks]
+    names = names[0] if len(names) == 1 else f"{', '.join(names[:-1])} and {names[-1]}"
+    return f"Buy {names} ({direction} {spec['k']} {label}s: {', '.join(f'{v:.2f}' for _, v in picks)})"
 
-    for ticker in tickers_to_check:
-        rsi = get_rsi(ticker, 9)
-        rsi_values.append((ticker, rsi))
-        print(f"{ticker:6s} - RSI(9): {rsi:.2f}")
+def ends_in_rank(strategy, decision_path):
+    """Whether a decision path ends in a rank node rather than a fixed signal."""
+    last = decision_path[-1]
+    child = strategy.tree[last['id']]['true' if last['result'] else 'false']
+    return not isinstance(child, str) and is_rank_node(strategy.tree[child])
 
-    # Sort by RSI ascending (lowest first)
-    rsi_values.sort(key=lambda x: x[1])
+def trigger_state(strategy, decision_path):
+    """
+    Trigger table and decision path to save with a strategy's state, so
+    later runs today can use check_triggers().
+
+    The table is built from settled closes, i.e. price_matrix without
+    today's live bar. Returns None when that is not possible: no live bar
+    for today (market closed, streaming run) or a path ending in a rank
+    node, whose ranking the triggers do not cover.
+    """
+    today = np.datetime64(_today_et().strftime('%Y-%m-%d'), 'D')
+    if ends_in_rank(strategy, decision_path):
+        return None
 
-    bottom_2 = rsi_values[:2]
+    tickers = {strategy.tree[step['id']]['ticker'] for step in decision_path}
+    if any(ticker not in price_matrix or price_matrix.last_date(ticker) != today
+           for ticker in tickers):
+        return None
 
-    print(f"\nBottom 2 RSIs:")
-    print(f"  1. {bottom_2[0][0]} (RSI: {bottom_2[0][1]:.2f})")
-    print(f"  2. {bottom_2[1][0]} (RSI: {bottom_2[1][1]:.2f})")
-    print("-"*80 + "\n")
+    def settled_closes(ticker):
+        return price_matrix.series(ticker)[:-1] if ticker in price_matrix else None
 
-    result = f"Buy {bottom_2[0][0]} and {bottom_2[1][0]} (Bottom 2 RSIs: {bottom_2[0][1]:.2f}, {bottom_2[1][1]:.2f})"
-    return result
+    return {
+        'date': str(today),
+        'digest': strategy.digest,
+        'path': [[step['id'], bool(step['result'])] for step in decision_path],
+        'table': build_trigger_table(strategy.tree, settled_closes),
+    }
 
-def main():
+def check_triggers(states, provider=None):
     """
-    Main execution function.
-    Runs all steps in order with verification.
+    Intraday shortcut: decide from live quotes alone whether any strategy's
+    last decision could have changed.
+
+    Each strategy's saved state holds today's trigger table and the path of
+    its last decision. One quote request covers every path ticker; if no
+    path node's trigger was crossed, every signal still stands and the run
+    can stop here.
+
+    Args:
+        states: {strategy name: last saved state or None}
+    Returns: ({strategy name: signal} or None when a full run is needed,
+              the live quotes fetched when a trigger crossed, else None)
     """
-    print("\n" + "╔" + "="*78 + "╗")
-    print("║" + " "*20 + "TRADING ALGORITHM EXECUTOR" + " "*32 + "║")
-    print("╚" + "="*78 + "╝")
+    today = _today_et()
+    saved = {}
+    for strategy in STRATEGIES:
+        state = states[strategy.name] or {}
+        triggers = state.get('triggers')
+        if not triggers or triggers['date'] != today.strftime('%Y-%m-%d') \
+                or triggers['digest'] != strategy.digest:
+            return None, None
+        saved[strategy.name] = (state['signal'], triggers)
 
-    # Run unit test first
-    test_rsi_calculation()
+    print("\n" + "="*80)
+    print("INTRADAY TRIGGER CHECK")
+    print("="*80 + "\n")
 
-    # Step 1: Download data
-    download_data()
+    tickers = sorted({triggers['table'][str(node_id)]['ticker']
+                      for _, triggers in saved.values() for node_id, _ in triggers['path']})
+    provider = provider or get_provider()
+    try:
+        quotes = provider.fetch_quotes(tickers, timeout=REQUEST_TIMEOUT)
+    except Exception as e:
+        print(f"⚠️  Quote request failed ({e}) - running the full pipeline")
+        return None, None
+    prices = {ticker: price for ticker, (timestamp, price) in quotes.items()
+              if timestamp.normalize() == today}
+
+    for name, (signal, triggers) in saved.items():
+        crossed = crossed_triggers(triggers['table'], triggers['path'], prices)
+        if crossed:
+            print(f"🔔 {name}: trigger crossed at ID {', '.join(str(i) for i in crossed)} - running the full pipeline")
+            print("\n" + "="*80 + "\n")
+            return None, {ticker: quotes[ticker] for ticker in prices}
+        print(f"✓ {name}: no trigger crossed on its path, still '{signal}'")
 
-    # Step 2: Calculate RSI
-    calculate_all_rsi()
+    print("\n" + "="*80 + "\n")
+    return {name: signal for name, (signal, _) in saved.items()}, None
+
+def decision_region(strategy, decision_path):
+    """
+    The region (see CompiledTree.region()) of the decision just made, as
+    saved with the state: [indicator, ticker, window, low, high,
+    low_closed, high_closed] per constrained feature, None for infinite
+    bounds. None for a rank node, whose result also depends on values
+    outside the path.
+    """
+    if ends_in_rank(strategy, decision_path):
+        return None
+
+    tree = strategy.compiled
+    path = [tree.node_ids.index(step['id']) for step in decision_path]
+    region = tree.region(path, [step['result'] for step in decision_path])
+    return {
+        'digest': strategy.digest,
+        'bounds': [list(tree.features[feature]) +
+                   [None if np.isinf(low) else low, None if np.isinf(high) else high,
+                    low_closed, high_closed]
+                   for feature, (low, high, low_closed, high_closed) in region.items()],
+    }
+
+def still_in_region(strategy, last_state):
+    """
+    Whether today's indicators still fall in the region of the strategy's
+    last decision, made earlier today. Every point of a region reaches the
+    same leaf, so the last signal stands without walking the tree.
+    """
+    region = (last_state or {}).get('region')
+    if not region or region['digest'] != strategy.digest or \
+            last_state.get('date') != _today_et().strftime('%Y-%m-%d'):
+        return False
 
-    # Step 3: Execute logic tree
-    final_decision, decision_path = execute_logic()
+    tree = strategy.compiled
+    bounds = {
+        tree.feature_index[(name, ticker, window)]:
+            [-np.inf if low is None else low, np.inf if high is None else high, low_closed, high_closed]
+        for name, ticker, window, low, high, low_closed, high_closed in region['bounds']
+    }
+    return tree.in_region(bounds, lambda feature: get_indicator(*tree.features[feature]))
 
+def inputs_unchanged(fingerprint, states):
+    """
+    Whether every strategy already decided on exactly these inputs today.
+
+    Each run saves the PriceMatrix.fingerprint() of its closes with the
+    state. When the same bars come back again (after hours, half-days, a
+    provider serving stale quotes), the indicators, tree and notification
+    decision would all repeat, so their saved signals stand.
+    Returns: {strategy name: signal}, or None when anything differs
+    """
+    today = _today_et().strftime('%Y-%m-%d')
+    decisions = {}
+    for strategy in STRATEGIES:
+        state = states[strategy.name] or {}
+        inputs = state.get('inputs')
+        if not inputs or state.get('date') != today or inputs['digest'] != strategy.digest \
+                or inputs['bars'] != fingerprint:
+            return None
+        decisions[strategy.name] = state['signal']
+    return decisions
+
+def dispatch_signal(strategy, final_decision, decision_path, last_state, fingerprint=None):
+    """
+    Steps 4-6 for one strategy: compare with its last saved state, notify
+    its Telegram chat if needed and save its new state (with the input
+    fingerprint, when there is one).
+
+    The chat ID comes from the strategy file's 'telegram_chat_id', or the
+    environment variable named by 'telegram_chat_id_env' (default
+    TELEGRAM_CHAT_ID); state is saved under strategy.state_key.
+    Returns: True if a notification was sent
+    """
     # Step 4: Check if we should notify
     print("\n" + "="*80)
     print("STEP 4: NOTIFICATION DECISION")
     print("="*80 + "\n")
 
-    last_state = read_state()
     notify, reason = should_notify(final_decision, last_state)
 
     print(f"Current Signal: {final_decision}")
@@ -679,7 +1053,8 @@ def main():
 
     # Step 5: Send Telegram notification (if needed and configured)
     bot_token = os.getenv('TELEGRAM_BOT_TOKEN')
-    chat_id = os.getenv('TELEGRAM_CHAT_ID')
+    chat_id = strategy.config.get('telegram_chat_id') or \
+        os.getenv(strategy.config.get('telegram_chat_id_env', 'TELEGRAM_CHAT_ID'))
 
     notified = False
 
@@ -688,7 +1063,9 @@ def main():
         print("STEP 5: SENDING TELEGRAM NOTIFICATION")
         print("="*80 + "\n")
 
-        telegram_message = format_telegram_report(final_decision, rsi_cache, decision_path)
+        telegram_message = format_telegram_report(
+            final_decision, rsi_cache, decision_path,
+            strategy_name=strategy.name if len(STRATEGIES) > 1 else None)
         success = send_telegram_message(telegram_message, bot_token, chat_id)
 
         if success:
@@ -708,13 +1085,104 @@ def main():
         print("="*80 + "\n")
 
     # Step 6: Save state for next run
-    write_state(final_decision, notified)
+    extra = {
+        'triggers': trigger_state(strategy, decision_path),
+        'region': decision_region(strategy, decision_path),
+        'inputs': {'digest': strategy.digest, 'bars': fingerprint} if fingerprint else None,
+    }
+    write_state(final_decision, notified, strategy.state_key,
+                extra={key: value for key, value in extra.items() if value})
+
+    return notified
+
+def main(context=None, provider=None, lazy=None, stream=None, triggers=None):
+    """
+    Main execution function.
+    Runs all steps in order with verification.
+
+    Args:
+        context: Lambda context object, used to bound the download stage
+        provider: MarketDataProvider to read bars from (default: get_provider())
+        lazy: Compute indicators on demand (default: LAZY_INDICATORS)
+        stream: Evaluate the tree as downloads arrive (default: STREAMING);
+                implies lazy
+        triggers: Try check_triggers() before anything else (default:
+                  TRIGGER_CHECK)
+    """
+    print("\n" + "╔" + "="*78 + "╗")
+    print("║" + " "*20 + "TRADING ALGORITHM EXECUTOR" + " "*32 + "║")
+    print("╚" + "="*78 + "╝")
+
+    # Run unit test first
+    test_rsi_calculation()
+
+    refresh_strategies()
+
+    if stream is None:
+        stream = STREAMING
+    if lazy is None:
+        lazy = LAZY_INDICATORS or stream
+    if triggers is None:
+        triggers = TRIGGER_CHECK
+
+    states = {strategy.name: read_state(strategy.state_key) for strategy in STRATEGIES}
+
+    # Live quotes check_triggers() already fetched for a crossed trigger
+    quotes = None
+    if triggers:
+        decisions, quotes = check_triggers(states, provider)
+        if decisions is not None:
+            print("ℹ️  Signals unchanged - skipping data refresh, RSI and notifications\n")
+            return decisions[STRATEGY.name] if len(STRATEGIES) == 1 else decisions
+
+    # Step 1: Download data
+    if stream:
+        # Bars are still arriving, so there is nothing to fingerprint up front
+        streaming_prices = stream_data(deadline=stage_deadline(context), provider=provider)
+        fingerprint = None
+    else:
+        streaming_prices = None
+        download_data(deadline=stage_deadline(context), provider=provider, quotes=quotes)
+
+        fingerprint = price_matrix.fingerprint()
+        decisions = inputs_unchanged(fingerprint, states)
+        if decisions is not None:
+            print("ℹ️  Inputs unchanged since the last run - skipping RSI, decision tree and notifications\n")
+            return decisions[STRATEGY.name] if len(STRATEGIES) == 1 else decisions
+
+    # Step 2: Calculate RSI
+    calculate_all_rsi(lazy=lazy, prices=streaming_prices)
+
+    # Steps 3-6 for every strategy, all reading the same prices and indicators
+    decisions = {}
+    for strategy in STRATEGIES:
+        last_state = states[strategy.name]
+
+        # Same cell of the tree as earlier today: same signal, nothing to send
+        if still_in_region(strategy, last_state):
+            decisions[strategy.name] = last_state['signal']
+            print(f"✓ {strategy.name}: indicators still inside the region of "
+                  f"'{last_state['signal']}' - skipping traversal and notification\n")
+            continue
+
+        final_decision, decision_path = execute_logic(strategy)
+        decisions[strategy.name] = final_decision
+        dispatch_signal(strategy, final_decision, decision_path, last_state, fingerprint)
+
+    if lazy:
+        print(f"ℹ️  Computed {len(indicator_engine.values)} of {len(indicator_requirements())} indicators on demand\n")
+
+    if streaming_prices is not None:
+        unused = streaming_prices.close()
+        if unused:
+            print(f"ℹ️  Downloads never needed by this run: {', '.join(unused)}\n")
 
     print("\n" + "╔" + "="*78 + "╗")
     print("║" + " "*25 + "EXECUTION COMPLETE" + " "*35 + "║")
     print("╚" + "="*78 + "╝" + "\n")
 
-    return final_decision
+    # One strategy: its signal, as before; several: {name: signal}
+    return decisions[STRATEGY.name] if len(STRATEGIES) == 1 else decisions
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,105 @@
+"""
+On-disk cache of settled daily OHLCV bars.
+One compressed NPZ file per ticker, stored column by column, so a run only
+has to fetch the bars that arrived after the cached watermark (last bar date).
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+# Check if running in AWS Lambda (only /tmp is writable there)
+IS_LAMBDA = os.environ.get('AWS_LAMBDA_FUNCTION_NAME') is not None
+
+CACHE_DIR = os.environ.get('PRICE_CACHE_DIR', '/tmp/price_cache' if IS_LAMBDA else '.price_cache')
+
+# Relative tolerance when checking a re-fetched bar against its cached copy
+REVISION_RTOL = 1e-6
+
+
+def _cache_path(ticker, cache_dir=None):
+    return os.path.join(cache_dir or CACHE_DIR, f"{ticker}.npz")
+
+
+def load_bars(ticker, cache_dir=None):
+    """
+    Load cached bars for a ticker (from CACHE_DIR unless cache_dir is given).
+    Returns a DataFrame indexed by date, or None if nothing usable is cached.
+    df.attrs['synced_on'] holds the ET date ('YYYY-MM-DD') of the last full
+    sync, i.e. the day the cached history was confirmed complete.
+    """
+    path = _cache_path(ticker, cache_dir)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if str(data['ticker']) != ticker or len(data['dates']) == 0:
+                return None
+            columns = [str(c) for c in data['columns']]
+            df = pd.DataFrame(
+                {c: data[f"col_{c}"] for c in columns},
+                index=pd.DatetimeIndex(data['dates'].astype('datetime64[ns]'), name='Date')
+            )
+            if str(data['watermark']) != df.index[-1].strftime('%Y-%m-%d'):
+                return None
+            df.attrs['synced_on'] = str(data['synced_on']) if 'synced_on' in data else None
+            return df
+    except Exception as e:
+        print(f"⚠️  Could not read cached bars for {ticker}: {e}")
+        return None
+
+
+def save_bars(ticker, df, synced_on, cache_dir=None):
+    """
+    Write bars for a ticker, keyed by symbol and last bar date (the watermark).
+    synced_on is the ET date ('YYYY-MM-DD') the bars were fetched on; every
+    settled bar before that date is in the cache.
+    The file is replaced atomically so a crashed run never leaves half a cache.
+    """
+    if df.empty:
+        return
+
+    try:
+        os.makedirs(cache_dir or CACHE_DIR, exist_ok=True)
+        columns = [str(c) for c in df.columns]
+        arrays = {f"col_{c}": df[c].to_numpy(dtype=float) for c in columns}
+
+        tmp_path = _cache_path(ticker, cache_dir) + '.tmp.npz'
+        np.savez_compressed(
+            tmp_path,
+            ticker=np.array(ticker),
+            watermark=np.array(df.index[-1].strftime('%Y-%m-%d')),
+            synced_on=np.array(synced_on),
+            dates=df.index.values.astype('datetime64[D]'),
+            columns=np.array(columns),
+            **arrays
+        )
+        os.replace(tmp_path, _cache_path(ticker, cache_dir))
+    except Exception as e:
+        print(f"⚠️  Could not write cached bars for {ticker}: {e}")
+
+
+def merge_delta(cached, delta):
+    """
+    Append freshly fetched bars to the cached history.
+
+    The delta request starts at the cached watermark, so its first bar
+    overlaps the last cached one. If that bar is missing or its close no
+    longer matches (a dividend or split adjustment rewrote history), the
+    cached bars are stale.
+
+    Returns: (merged DataFrame or None, revised: bool)
+    """
+    watermark = cached.index[-1]
+
+    if watermark not in delta.index:
+        return None, True
+
+    old_close = cached['Close'].iloc[-1]
+    new_close = delta.loc[watermark, 'Close']
+    if not np.isclose(old_close, new_close, rtol=REVISION_RTOL, atol=0.0):
+        return None, True
+
+    merged = pd.concat([cached[cached.index < watermark], delta[delta.index >= watermark]])
+    return merged[cached.columns.intersection(merged.columns)], False
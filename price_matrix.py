@@ -0,0 +1,124 @@
+"""
+Compact in-memory price store for the trading algorithm.
+Only closes are kept: one date-aligned 2-D float array (tickers x trading
+days) plus a symbol -> row index, so indicator code can work on views of a
+single contiguous block instead of a dict of OHLCV DataFrames.
+"""
+
+import hashlib
+import io
+import numpy as np
+import pandas as pd
+
+
+class PriceMatrix:
+    """
+    Date-aligned daily closes for a universe of tickers.
+
+    Attributes:
+        tickers: list of symbols, one per row
+        index: dict of symbol -> row number
+        dates: datetime64[D] array, one per column (ascending)
+        closes: float64 array of shape (len(tickers), len(dates));
+                NaN where a ticker has no bar for that date
+    """
+
+    def __init__(self, tickers, dates, closes):
+        self.tickers = list(tickers)
+        self.index = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.dates = np.asarray(dates, dtype='datetime64[D]')
+        self.closes = np.ascontiguousarray(closes, dtype=np.float64)
+
+    @classmethod
+    def from_frames(cls, frames):
+        """
+        Build the matrix from per-ticker OHLCV DataFrames.
+        Everything but Close is dropped here, at ingest.
+        """
+        tickers = list(frames)
+        columns = {}
+        for ticker in tickers:
+            close = frames[ticker]['Close']
+            # yfinance single-ticker downloads come back with MultiIndex columns
+            if isinstance(close, pd.DataFrame):
+                close = close.iloc[:, 0]
+            columns[ticker] = (close.index.values.astype('datetime64[D]'),
+                               close.to_numpy(dtype=np.float64))
+
+        dates = np.unique(np.concatenate([d for d, _ in columns.values()])) if columns \
+            else np.array([], dtype='datetime64[D]')
+
+        closes = np.full((len(tickers), len(dates)), np.nan)
+        for row, ticker in enumerate(tickers):
+            ticker_dates, values = columns[ticker]
+            closes[row, np.searchsorted(dates, ticker_dates)] = values
+
+        return cls(tickers, dates, closes)
+
+    def to_bytes(self, **meta):
+        """
+        Serialize to a compact compressed NPZ payload.
+        Extra keyword arguments are stored as scalar metadata.
+        """
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer,
+            tickers=np.array(self.tickers),
+            dates=self.dates,
+            closes=self.closes,
+            **{f"meta_{key}": np.array(value) for key, value in meta.items()}
+        )
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, payload):
+        """
+        Inverse of to_bytes().
+        Returns: (PriceMatrix, dict of metadata)
+        """
+        with np.load(io.BytesIO(payload), allow_pickle=False) as data:
+            matrix = cls([str(t) for t in data['tickers']], data['dates'], data['closes'])
+            meta = {key[len('meta_'):]: data[key].item() for key in data.files
+                    if key.startswith('meta_')}
+        return matrix, meta
+
+    def __contains__(self, ticker):
+        return ticker in self.index
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def row(self, ticker):
+        """Zero-copy view of a ticker's full row, NaN padding included."""
+        return self.closes[self.index[ticker]]
+
+    def series(self, ticker):
+        """
+        A ticker's closes with missing days removed.
+        Shorter histories are NaN-padded on the left only, so this is normally
+        a zero-copy view of the row's tail; a copy is made only when a
+        ticker has gaps in the middle of its history.
+        """
+        row = self.row(ticker)
+        valid = ~np.isnan(row)
+        first = int(valid.argmax())
+        if valid[first:].all():
+            return row[first:]
+        return row[valid]
+
+    def fingerprint(self):
+        """
+        Identity of the inputs: per ticker, the last bar date plus a hash of
+        its closes, so any new, revised or provisional close changes it.
+        Returns: dict of ticker -> 'YYYY-MM-DD:<hash>'
+        """
+        return {
+            ticker: f"{self.last_date(ticker)}:"
+                    f"{hashlib.blake2b(self.series(ticker).tobytes(), digest_size=8).hexdigest()}"
+            for ticker in self.tickers
+        }
+
+    def last_date(self, ticker):
+        """Date of the ticker's most recent close, or None."""
+        valid = np.flatnonzero(~np.isnan(self.row(ticker)))
+        return self.dates[valid[-1]] if len(valid) else None
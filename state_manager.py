@@ -1,6 +1,8 @@
 """
 State management for trading algorithm.
 Supports both local file storage (for local/GitHub) and S3 (for Lambda).
+Also holds the price snapshot shared between the Lambda and GitHub Actions
+runners, so whichever runs first does the downloading for both.
 """
 
 import json
@@ -15,39 +17,61 @@ STATE_FILE = 'trading_state.json'
 S3_BUCKET = os.environ.get('STATE_BUCKET_NAME', 'trading-algorithm-state')
 S3_KEY = 'trading_state.json'
 
-if IS_LAMBDA:
+# Shared price snapshot: the state bucket in Lambda, or anywhere with
+# SHARED_CACHE_BACKEND=s3 (e.g. GitHub Actions with AWS credentials);
+# otherwise a local directory stands in for the bucket.
+SHARED_CACHE_BACKEND = os.environ.get('SHARED_CACHE_BACKEND', 's3' if IS_LAMBDA else 'local')
+SHARED_CACHE_DIR = os.environ.get('SHARED_CACHE_DIR', '.shared_cache')
+SNAPSHOT_KEY = 'price_snapshot.npz'
+
+if IS_LAMBDA or SHARED_CACHE_BACKEND == 's3':
     import boto3
     s3_client = boto3.client('s3')
 
 
-def read_state():
+def _state_name(key, default):
+    """
+    File name / S3 key of a strategy's state. key=None is the original
+    single-strategy state (`default`), so existing deployments keep their
+    history.
+    """
+    return default if key is None else f"trading_state_{key}.json"
+
+
+def read_state(key=None):
     """
     Read the last trading signal state.
+
+    Args:
+        key: Strategy state key (None for the default strategy)
+
     Returns dict with 'signal' and 'date', or None if doesn't exist.
     """
     try:
         if IS_LAMBDA:
             # Read from S3
-            response = s3_client.get_object(Bucket=S3_BUCKET, Key=S3_KEY)
+            response = s3_client.get_object(Bucket=S3_BUCKET, Key=_state_name(key, S3_KEY))
             state_json = response['Body'].read().decode('utf-8')
             return json.loads(state_json)
         else:
             # Read from local file
-            if os.path.exists(STATE_FILE):
-                with open(STATE_FILE, 'r') as f:
+            if os.path.exists(_state_name(key, STATE_FILE)):
+                with open(_state_name(key, STATE_FILE), 'r') as f:
                     return json.load(f)
     except Exception as e:
         print(f"⚠️  Could not read state: {e}")
     return None
 
 
-def write_state(signal, notified):
+def write_state(signal, notified, key=None, extra=None):
     """
     Write current trading signal state.
 
     Args:
         signal: The current trading signal
         notified: Whether we sent a notification this time
+        key: Strategy state key (None for the default strategy)
+        extra: Optional dict of additional fields to store
     """
     try:
         # Get current time in Eastern Time
@@ -60,22 +84,71 @@ def write_state(signal, notified):
             'timestamp': et_time.strftime('%Y-%m-%d %H:%M:%S'),
             'notified': notified
         }
+        state.update(extra or {})
         state_json = json.dumps(state, indent=2)
 
         if IS_LAMBDA:
             # Write to S3
             s3_client.put_object(
                 Bucket=S3_BUCKET,
-                Key=S3_KEY,
+                Key=_state_name(key, S3_KEY),
                 Body=state_json,
                 ContentType='application/json'
             )
-            print(f"✓ State saved to S3: s3://{S3_BUCKET}/{S3_KEY}")
+            print(f"✓ State saved to S3: s3://{S3_BUCKET}/{_state_name(key, S3_KEY)}")
         else:
             # Write to local file
-            with open(STATE_FILE, 'w') as f:
+            with open(_state_name(key, STATE_FILE), 'w') as f:
                 f.write(state_json)
-            print(f"✓ State saved to local file: {STATE_FILE}")
+            print(f"✓ State saved to local file: {_state_name(key, STATE_FILE)}")
 
     except Exception as e:
         print(f"⚠️  Could not write state: {e}")
+
+
+def read_price_snapshot():
+    """
+    Read the shared price snapshot.
+    Returns the raw bytes, or None if there is none (or it can't be read).
+    """
+    try:
+        if SHARED_CACHE_BACKEND == 's3':
+            response = s3_client.get_object(Bucket=S3_BUCKET, Key=SNAPSHOT_KEY)
+            return response['Body'].read()
+        else:
+            path = os.path.join(SHARED_CACHE_DIR, SNAPSHOT_KEY)
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    return f.read()
+    except Exception as e:
+        if 'NoSuchKey' not in str(e):
+            print(f"⚠️  Could not read price snapshot: {e}")
+    return None
+
+
+def write_price_snapshot(payload):
+    """
+    Publish a price snapshot for the other runner to reuse.
+
+    Args:
+        payload: Serialized snapshot bytes (see PriceMatrix.to_bytes)
+    """
+    try:
+        if SHARED_CACHE_BACKEND == 's3':
+            s3_client.put_object(
+                Bucket=S3_BUCKET,
+                Key=SNAPSHOT_KEY,
+                Body=payload,
+                ContentType='application/octet-stream'
+            )
+            print(f"✓ Price snapshot published to S3: s3://{S3_BUCKET}/{SNAPSHOT_KEY}")
+        else:
+            os.makedirs(SHARED_CACHE_DIR, exist_ok=True)
+            path = os.path.join(SHARED_CACHE_DIR, SNAPSHOT_KEY)
+            with open(path + '.tmp', 'wb') as f:
+                f.write(payload)
+            os.replace(path + '.tmp', path)
+            print(f"✓ Price snapshot published to local file: {path}")
+
+    except Exception as e:
+        print(f"⚠️  Could not write price snapshot: {e}")
@@ -0,0 +1,435 @@
+"""
+Strategy files for the trading algorithm.
+
+A strategy is a decision tree stored as JSON (or YAML when PyYAML is
+installed) instead of Python:
+
+    {
+      "name": "default",
+      "root": 1,
+      "nodes": {
+        "1": {"ticker": "QQQ", "window": 9, "threshold": 79, "operator": ">",
+              "true": 2, "false": 3},
+        ...
+        "38": {"type": "rank", "tickers": ["SOXL", "TECL", "TQQQ", "FNGU"],
+               "indicator": "rsi_sma", "window": 9, "k": 2, "direction": "bottom"}
+      }
+    }
+
+Comparison nodes route to another node or a signal string; rank nodes end
+the walk by picking the k lowest ("bottom") or highest ("top") values.
+
+Loading validates the tree and compiles it with decision_engine. The
+compiled plan is cached on disk keyed by a hash of the file's bytes, so a
+warm start with an unchanged file skips parsing and validation, and
+get_strategy() reloads a file whose mtime changed in long-lived processes.
+
+get_evaluator() returns the tree as generated Python (nested ifs over local
+floats, see CompiledTree.source()), written once per strategy hash as a
+module in the same cache directory. Run this file to check it against a
+walk of the tree dict:
+
+    python3 strategy.py [strategy file]
+"""
+
+import hashlib
+import importlib.util
+import json
+import math
+import os
+import pickle
+import random
+import sys
+import time
+
+from decision_engine import OPERATOR_CODES, RANK_DIRECTIONS, compile_tree, is_rank_node
+from indicators import INDICATORS
+
+# Check if running in AWS Lambda (only /tmp is writable there)
+IS_LAMBDA = os.environ.get('AWS_LAMBDA_FUNCTION_NAME') is not None
+
+STRATEGY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'strategies')
+DEFAULT_STRATEGY_FILE = os.path.join(STRATEGY_DIR, 'default.json')
+
+PLAN_CACHE_DIR = os.environ.get('STRATEGY_CACHE_DIR',
+                                '/tmp/strategy_cache' if IS_LAMBDA else '.strategy_cache')
+
+# Bump when the cached plan layout (Strategy or CompiledTree) changes
+PLAN_VERSION = 3
+
+REQUIRED_FIELDS = ('ticker', 'window', 'threshold', 'true', 'false')
+RANK_FIELDS = ('tickers', 'window', 'k')
+
+
+class StrategyError(ValueError):
+    """Raised when a strategy file is malformed or its tree is invalid."""
+
+
+class Strategy:
+    """
+    A loaded, validated strategy.
+
+    Attributes:
+        name: strategy name (defaults to the file name)
+        path: file it was loaded from
+        digest: SHA-256 of the file's bytes
+        tree: {node id: node dict}, the LOGIC_TREE layout
+        root: ID of the first node
+        compiled: CompiledTree of `tree`
+        config: every other top-level key of the file, e.g.
+                'telegram_chat_id' / 'telegram_chat_id_env' and 'state_key'
+    """
+
+    def __init__(self, name, path, digest, tree, root, config):
+        self.name = name
+        self.path = path
+        self.digest = digest
+        self.tree = tree
+        self.root = root
+        self.config = config
+        self.compiled = compile_tree(tree, root)
+
+    @property
+    def state_key(self):
+        """
+        Key its saved state is stored under: the file's 'state_key', else
+        its name; the 'default' strategy keeps the original unkeyed state.
+        """
+        return self.config.get('state_key', None if self.name == 'default' else self.name)
+
+
+def _parse(path, raw):
+    """Decode JSON or YAML by file extension."""
+    if path.endswith(('.yaml', '.yml')):
+        try:
+            import yaml
+        except ImportError:
+            raise StrategyError(f"{path}: YAML strategy files need PyYAML (pip install pyyaml)")
+        return yaml.safe_load(raw)
+    return json.loads(raw)
+
+
+def validate_tree(tree, root):
+    """
+    Check a {node id: node} tree before compiling it.
+
+    Every comparison node must have the REQUIRED_FIELDS, a known operator
+    and indicator, a numeric threshold, and children that are either signal strings or IDs of
+    defined nodes; every rank node the RANK_FIELDS, with 1 <= k <= number
+    of tickers and a known direction. The root must be a comparison node.
+    Every defined node must be reachable from `root` and no path may loop
+    back on itself. Gaps in the numbering (the tree has no ID 7, 11, ...)
+    are fine; only references to them are errors.
+
+    Raises: StrategyError listing every problem found
+    """
+    problems = []
+    if root not in tree:
+        raise StrategyError(f"Root node {root} is not defined")
+    if is_rank_node(tree[root]):
+        raise StrategyError(f"Root node {root} must be a comparison, not a rank node")
+
+    for node_id, node in tree.items():
+        if node.get('type', 'compare') not in ('compare', 'rank'):
+            problems.append(f"ID {node_id}: unknown node type {node['type']!r}")
+            continue
+        if node.get('indicator', 'rsi_sma') not in INDICATORS:
+            problems.append(f"ID {node_id}: unknown indicator {node['indicator']!r}")
+        if is_rank_node(node):
+            missing = [field for field in RANK_FIELDS if field not in node]
+            if missing:
+                problems.append(f"ID {node_id}: missing {', '.join(missing)}")
+                continue
+            if not isinstance(node['tickers'], list) or not node['tickers']:
+                problems.append(f"ID {node_id}: tickers must be a non-empty list")
+            elif not isinstance(node['k'], int) or not 1 <= node['k'] <= len(node['tickers']):
+                problems.append(f"ID {node_id}: k must be between 1 and {len(node['tickers'])}")
+            if node.get('direction', 'bottom') not in RANK_DIRECTIONS:
+                problems.append(f"ID {node_id}: direction must be one of {', '.join(RANK_DIRECTIONS)}")
+            if not isinstance(node['window'], int) or node['window'] < 1:
+                problems.append(f"ID {node_id}: window must be a positive integer")
+            continue
+
+        missing = [field for field in REQUIRED_FIELDS if field not in node]
+        if missing:
+            problems.append(f"ID {node_id}: missing {', '.join(missing)}")
+            continue
+        if node.get('operator', '>') not in OPERATOR_CODES:
+            problems.append(f"ID {node_id}: unknown operator {node['operator']!r}")
+        if not isinstance(node['window'], int) or node['window'] < 1:
+            problems.append(f"ID {node_id}: window must be a positive integer")
+        if isinstance(node['threshold'], bool) or not isinstance(node['threshold'], (int, float)):
+            problems.append(f"ID {node_id}: threshold must be a number, not {node['threshold']!r}")
+        for branch in ('true', 'false'):
+            child = node[branch]
+            if not isinstance(child, str) and child not in tree:
+                problems.append(f"ID {node_id}: '{branch}' points to undefined ID {child}")
+    if problems:
+        raise StrategyError("Invalid strategy tree:\n  " + "\n  ".join(problems))
+
+    # Depth-first walk from the root: a child already on the current path
+    # is a cycle; nodes never visited are unreachable
+    visited = set()
+    on_path = set()
+
+    def walk(node_id):
+        visited.add(node_id)
+        if is_rank_node(tree[node_id]):
+            return
+        on_path.add(node_id)
+        for child in (tree[node_id]['true'], tree[node_id]['false']):
+            if isinstance(child, str):
+                continue
+            if child in on_path:
+                problems.append(f"ID {node_id}: cycle back to ID {child}")
+            elif child not in visited:
+                walk(child)
+        on_path.discard(node_id)
+
+    walk(root)
+    unreachable = sorted(set(tree) - visited)
+    if unreachable:
+        problems.append(f"Unreachable from ID {root}: {', '.join(str(i) for i in unreachable)}")
+    if problems:
+        raise StrategyError("Invalid strategy tree:\n  " + "\n  ".join(problems))
+
+
+def _build(path, raw, digest):
+    """Parse, validate and compile a strategy file's contents."""
+    try:
+        document = _parse(path, raw)
+    except ValueError as e:
+        raise StrategyError(f"{path}: {e}")
+    if not isinstance(document, dict) or not isinstance(document.get('nodes'), dict):
+        raise StrategyError(f"{path}: expected an object with a 'nodes' mapping")
+
+    try:
+        tree = {int(node_id): dict(node) for node_id, node in document['nodes'].items()}
+        for node in tree.values():
+            for branch in ('true', 'false'):
+                if isinstance(node.get(branch), float) and node[branch].is_integer():
+                    node[branch] = int(node[branch])
+    except (TypeError, ValueError) as e:
+        raise StrategyError(f"{path}: node IDs must be integers ({e})")
+
+    try:
+        root = int(document.get('root', 1))
+    except (TypeError, ValueError):
+        raise StrategyError(f"{path}: root must be a node ID, not {document['root']!r}")
+    validate_tree(tree, root)
+
+    config = {key: value for key, value in document.items() if key not in ('nodes', 'root', 'name')}
+    # A missing name is filled in from the path by load_strategy(), so the
+    # cached plan, shared by every file with these bytes, holds no file name
+    return Strategy(document.get('name') or None, path, digest, tree, root, config)
+
+
+def _plan_path(digest):
+    return os.path.join(PLAN_CACHE_DIR, f"{digest}.pkl")
+
+
+def load_strategy(path=DEFAULT_STRATEGY_FILE):
+    """
+    Load a strategy file, using the cached compiled plan when the file's
+    contents are unchanged.
+    Returns: Strategy
+    Raises: StrategyError if the file is invalid
+    """
+    with open(path, 'rb') as f:
+        raw = f.read()
+    digest = hashlib.sha256(raw + f"/v{PLAN_VERSION}".encode()).hexdigest()
+
+    plan_path = _plan_path(digest)
+    if os.path.exists(plan_path):
+        try:
+            with open(plan_path, 'rb') as f:
+                strategy = pickle.load(f)
+            return _located(strategy, path)
+        except Exception as e:
+            print(f"⚠️  Could not read cached plan for {path}: {e}")
+
+    strategy = _build(path, raw.decode('utf-8'), digest)
+
+    try:
+        os.makedirs(PLAN_CACHE_DIR, exist_ok=True)
+        tmp_path = plan_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(strategy, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, plan_path)
+    except Exception as e:
+        print(f"⚠️  Could not cache compiled plan for {path}: {e}")
+
+    return _located(strategy, path)
+
+
+def _located(strategy, path):
+    """Attach a loaded plan to `path`, naming it after the file if it has no "name"."""
+    strategy.path = path
+    if strategy.name is None:
+        strategy.name = os.path.splitext(os.path.basename(path))[0]
+    return strategy
+
+
+# path -> (mtime_ns, Strategy) for get_strategy()
+_loaded = {}
+
+
+def get_strategy(path=DEFAULT_STRATEGY_FILE):
+    """
+    The strategy in `path`, reloaded only when the file's mtime changed
+    since the last call (cheap enough to call at the start of every run).
+    Returns: Strategy
+    """
+    mtime = os.stat(path).st_mtime_ns
+    cached = _loaded.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    strategy = load_strategy(path)
+    if cached is not None:
+        print(f"🔄 Reloaded strategy '{strategy.name}' from {path}")
+    _loaded[path] = (mtime, strategy)
+    return strategy
+
+
+# digest -> generated evaluate_leaf() for get_evaluator()
+_evaluators = {}
+
+
+def get_evaluator(strategy):
+    """
+    The strategy's tree as a generated Python function, values -> leaf
+    index, equivalent to strategy.compiled.evaluate_leaf() but several
+    times faster per call.
+
+    The source is written to PLAN_CACHE_DIR/evaluator_<digest>.py the first
+    time and imported from there afterwards; if the cache is not writable
+    the function is compiled in memory instead.
+
+    Args:
+        strategy: Strategy
+    Returns: function(values) where values follows strategy.compiled.features
+    """
+    evaluator = _evaluators.get(strategy.digest)
+    if evaluator is not None:
+        return evaluator
+
+    module_name = f"evaluator_{strategy.digest}"
+    module_path = os.path.join(PLAN_CACHE_DIR, f"{module_name}.py")
+    source = None
+    if not os.path.exists(module_path):
+        source = strategy.compiled.source()
+        try:
+            os.makedirs(PLAN_CACHE_DIR, exist_ok=True)
+            tmp_path = module_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                f.write(f"# Generated from {os.path.basename(strategy.path)} "
+                        f"(strategy '{strategy.name}') - do not edit\n{source}")
+            os.replace(tmp_path, module_path)
+        except Exception as e:
+            print(f"⚠️  Could not cache generated evaluator for {strategy.path}: {e}")
+
+    if os.path.exists(module_path):
+        spec = importlib.util.spec_from_file_location(module_name, module_path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        evaluator = module.evaluate_leaf
+    else:
+        namespace = {}
+        exec(compile(source, f"<{module_name}>", 'exec'), namespace)
+        evaluator = namespace['evaluate_leaf']
+
+    _evaluators[strategy.digest] = evaluator
+    return evaluator
+
+
+def walk_tree(tree, root, get_value):
+    """
+    Reference traversal of a {node id: node} tree, the way execute_logic()
+    reads it: one dict lookup per node.
+    Returns: the signal string or rank node ID the walk ends at
+    """
+    node_id = root
+    while True:
+        node = tree[node_id]
+        value = get_value(node.get('indicator', 'rsi_sma'), node['ticker'], node['window'])
+        if node.get('operator', '>') == '>':
+            result = value > node['threshold']
+        else:
+            result = value < node['threshold']
+        node_id = node['true' if result else 'false']
+        if isinstance(node_id, str) or is_rank_node(tree[node_id]):
+            return node_id
+
+
+def test_generated_evaluator(path=DEFAULT_STRATEGY_FILE, samples=20000, seed=0):
+    """
+    Equivalence check of get_evaluator() against walk_tree().
+
+    Feature values are drawn at, just around and far from every threshold
+    the feature is compared with, plus NaN, so every branch and every
+    boundary is exercised. Also times both evaluators.
+
+    Returns: number of mismatching samples (0 when equivalent)
+    """
+    print("\n" + "="*80)
+    print("UNIT TEST: Generated Evaluator vs Tree Walk")
+    print("="*80)
+
+    strategy = load_strategy(path)
+    compiled = strategy.compiled
+    evaluator = get_evaluator(strategy)
+
+    rank_leaves = {spec['id']: leaf for leaf, spec in compiled.ranks.items()}
+    leaf_of = {signal: leaf for leaf, signal in enumerate(compiled.leaves) if leaf not in compiled.ranks}
+    leaf_of.update(rank_leaves)
+
+    thresholds = {i: set() for i in range(len(compiled.features))}
+    for node in range(len(compiled)):
+        thresholds[int(compiled.feature[node])].add(float(compiled.threshold[node]))
+
+    rng = random.Random(seed)
+
+    def draw(feature):
+        choice = rng.random()
+        if choice < 0.05 or not thresholds[feature]:
+            return float('nan') if choice < 0.05 else rng.uniform(0, 100)
+        threshold = rng.choice(sorted(thresholds[feature]))
+        if choice < 0.35:
+            return threshold
+        if choice < 0.65:
+            return math.nextafter(threshold, rng.choice((-math.inf, math.inf)))
+        return threshold + rng.uniform(-20, 20)
+
+    vectors = [[draw(f) for f in range(len(compiled.features))] for _ in range(samples)]
+
+    mismatches = 0
+    for values in vectors:
+        by_key = dict(zip(compiled.features, values))
+        expected = leaf_of[walk_tree(strategy.tree, strategy.root, lambda *key: by_key[key])]
+        if evaluator(values) != expected or compiled.evaluate_leaf(values) != expected:
+            mismatches += 1
+
+    print(f"Strategy: {strategy.name} ({len(compiled)} nodes, {len(compiled.features)} features)")
+    print(f"Samples: {samples}, mismatches: {mismatches}")
+
+    lookups = [dict(zip(compiled.features, values)) for values in vectors]
+    timings = [
+        ("Tree walk", lambda: [walk_tree(strategy.tree, strategy.root, lambda *key: by_key[key])
+                               for by_key in lookups]),
+        ("Compiled arrays", lambda: [compiled.evaluate_leaf(values) for values in vectors]),
+        ("Generated code", lambda: [evaluator(values) for values in vectors]),
+    ]
+    for label, run in timings:
+        started = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - started
+        print(f"  {label:<16} {elapsed / samples * 1e9:8.0f} ns per evaluation")
+
+    print("✓ Equivalent" if mismatches == 0 else "❌ Generated evaluator disagrees with the tree walk")
+    print("="*80 + "\n")
+    return mismatches
+
+
+if __name__ == "__main__":
+    sys.exit(1 if test_generated_evaluator(*sys.argv[1:2]) else 0)
@@ -0,0 +1,269 @@
+"""
+Parallel parameter sweep over the decision tree's thresholds and windows.
+
+Each combination is a copy of LOGIC_TREE with some node thresholds or
+windows replaced, backtested with backtest.run_backtest(). The price matrix
+and the history of every indicator any combination can read are computed
+once and placed in shared memory; worker processes map them as NumPy views
+instead of receiving pickled copies, so each task only carries its
+parameter values.
+
+Usage:
+    python3 sweep.py --param 2.threshold=77:82:0.5 --param 4.threshold=79:85:1
+    python3 sweep.py --param 2.threshold=70:90 --param 2.window=5:14 --random 500
+"""
+
+import argparse
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from backtest import load_history, parse_allocation, run_backtest
+from decision_engine import compile_tree, is_rank_node
+from indicators import feature_history
+from price_matrix import PriceMatrix
+import main
+
+SWEEP_FIELDS = ('threshold', 'window')
+RANK_METRICS = ('sharpe', 'cagr', 'total_return', 'max_drawdown', 'volatility')
+
+# Worker state, set once per process by _init_worker()
+_shared = {}
+
+
+def parse_param(text):
+    """
+    Parse a --param spec: "<node id>.<field>=<values>", where values is a
+    list "25,28,30" or an inclusive range "start:stop[:step]" (step
+    defaults to 1).
+    Returns: ((node_id, field), values, (low, high) or None for lists)
+    """
+    target, _, values = text.partition('=')
+    node_id, _, field = target.partition('.')
+    node_id = int(node_id)
+    if node_id not in main.LOGIC_TREE:
+        raise ValueError(f"Unknown node ID {node_id} in --param {text}")
+    if field not in SWEEP_FIELDS or (field == 'threshold' and is_rank_node(main.LOGIC_TREE[node_id])):
+        raise ValueError(f"Field must be one of {SWEEP_FIELDS} in --param {text}")
+
+    cast = int if field == 'window' else float
+    if ':' in values:
+        parts = [float(v) for v in values.split(':')]
+        start, stop = parts[0], parts[1]
+        step = parts[2] if len(parts) > 2 else 1.0
+        grid = [cast(round(v, 10)) for v in np.arange(start, stop + step / 2, step)]
+        return (node_id, field), grid, (start, stop)
+    return (node_id, field), [cast(v) for v in values.split(',')], None
+
+
+def grid_combinations(params):
+    """Every combination of the parameter grids (cartesian product)."""
+    keys = [key for key, _, _ in params]
+    for values in itertools.product(*[grid for _, grid, _ in params]):
+        yield dict(zip(keys, values))
+
+
+def random_combinations(params, count, seed=None):
+    """
+    `count` random combinations: ranges are sampled uniformly (windows as
+    integers, thresholds rounded to 0.01), lists by picking one value.
+    """
+    rng = random.Random(seed)
+    for _ in range(count):
+        combination = {}
+        for (node_id, field), grid, bounds in params:
+            if bounds is None:
+                value = rng.choice(grid)
+            elif field == 'window':
+                value = rng.randint(int(bounds[0]), int(bounds[1]))
+            else:
+                value = round(rng.uniform(*bounds), 2)
+            combination[(node_id, field)] = value
+        yield combination
+
+
+def apply_params(combination, tree=None):
+    """A copy of LOGIC_TREE with the combination's values substituted."""
+    tree = {node_id: dict(node) for node_id, node in (tree or main.LOGIC_TREE).items()}
+    for (node_id, field), value in combination.items():
+        tree[node_id][field] = value
+    return tree
+
+
+def sweep_features(params):
+    """
+    Every (indicator, ticker, window) a combination can read: the base
+    tree's (rank node candidates included) and each swept window of its
+    node, for every ticker a rank node ranks.
+    """
+    features = list(compile_tree(main.LOGIC_TREE, main.STRATEGY.root).features)
+    for (node_id, field), grid, bounds in params:
+        if field != 'window':
+            continue
+        node = main.LOGIC_TREE[node_id]
+        tickers = node['tickers'] if is_rank_node(node) else [node['ticker']]
+        windows = range(int(bounds[0]), int(bounds[1]) + 1) if bounds else grid
+        features += [(node.get('indicator', 'rsi_sma'), ticker, w) for ticker in tickers for w in windows]
+    return list(dict.fromkeys(features))
+
+
+def _to_shared(array):
+    """Copy an array into a new shared memory block. Returns (block, view)."""
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    view = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+    view[:] = array
+    return block, view
+
+
+def _init_worker(spec):
+    """Map the shared price and indicator matrices into this worker."""
+    blocks = {name: shared_memory.SharedMemory(name=spec[name]['name'])
+              for name in ('closes', 'features')}
+    arrays = {name: np.ndarray(spec[name]['shape'], dtype=np.float64, buffer=block.buf)
+              for name, block in blocks.items()}
+
+    _shared['blocks'] = blocks  # keep the mappings alive
+    _shared['matrix'] = PriceMatrix(spec['tickers'], spec['dates'], arrays['closes'])
+    _shared['features'] = arrays['features']
+    _shared['columns'] = {feature: i for i, feature in enumerate(spec['feature_list'])}
+    _shared['start_date'] = spec['start_date']
+    _shared['cost_bps'] = spec['cost_bps']
+    _shared['root'] = spec['root']
+
+
+def _shared_feature_matrix(requirements):
+    columns = [_shared['columns'][requirement] for requirement in requirements]
+    return _shared['features'][:, columns]
+
+
+def _run_combination(combination):
+    """Backtest one combination inside a worker. Returns (combination, metrics)."""
+    tree = compile_tree(apply_params(combination), _shared['root'])
+    result = run_backtest(_shared['matrix'], tree, start_date=_shared['start_date'],
+                          cost_bps=_shared['cost_bps'], feature_matrix=_shared_feature_matrix)
+    return combination, result['metrics']
+
+
+def run_sweep(matrix, params, combinations, start_date=None, cost_bps=0.0, workers=None):
+    """
+    Backtest every combination on a process pool.
+
+    The closes and the indicator history of sweep_features(params) are
+    computed here once and shared with the workers through
+    multiprocessing.shared_memory. Backtests start at start_date or at
+    the first date where all of those indicators exist, whichever is
+    later, so every combination is scored over the same days.
+
+    Returns: list of (combination, metrics), in input order
+    """
+    feature_list = sweep_features(params)
+    features = feature_history(matrix, feature_list)
+
+    first = int(np.argmax(~np.isnan(features).any(axis=1)))
+    start = matrix.dates[first]
+    if start_date is not None:
+        start = max(start, np.datetime64(start_date, 'D'))
+
+    closes_block, _ = _to_shared(matrix.closes)
+    features_block, _ = _to_shared(features)
+    spec = {
+        'closes': {'name': closes_block.name, 'shape': matrix.closes.shape},
+        'features': {'name': features_block.name, 'shape': features.shape},
+        'tickers': matrix.tickers,
+        'dates': matrix.dates,
+        'feature_list': feature_list,
+        'start_date': start,
+        'cost_bps': cost_bps,
+        'root': main.STRATEGY.root,
+    }
+
+    combinations = list(combinations)
+    workers = workers or os.cpu_count() or 1
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(spec,)) as executor:
+            chunksize = max(1, len(combinations) // (workers * 4))
+            return list(executor.map(_run_combination, combinations, chunksize=chunksize))
+    finally:
+        for block in (closes_block, features_block):
+            block.close()
+            block.unlink()
+
+
+def _describe(combination):
+    return ", ".join(f"ID {node_id}.{field}={value:g}"
+                     for (node_id, field), value in combination.items())
+
+
+def print_ranking(results, metric='sharpe', top=10, baseline=None):
+    """
+    Print the best `top` combinations by `metric`: highest first, except
+    volatility (lowest first); max drawdown is negative, so the shallowest
+    ranks first.
+    """
+    ranked = sorted(results, key=lambda item: item[1][metric], reverse=metric != 'volatility')
+
+    print("\n" + "="*80)
+    print(f"TOP {min(top, len(ranked))} OF {len(ranked)} COMBINATIONS BY {metric.upper()}")
+    print("="*80 + "\n")
+    print(f"{'#':>3}  {'Sharpe':>7} {'CAGR':>8} {'MaxDD':>8} {'Turnover':>9}  Parameters")
+
+    rows = [(str(rank), combination, metrics)
+            for rank, (combination, metrics) in enumerate(ranked[:top], 1)]
+    if baseline is not None:
+        rows.append(('now', {}, baseline))
+    for label, combination, metrics in rows:
+        print(f"{label:>3}  {metrics['sharpe']:7.2f} {metrics['cagr']*100:7.2f}% "
+              f"{metrics['max_drawdown']*100:7.2f}% {metrics['annual_turnover']*100:8.0f}%  "
+              f"{_describe(combination) if combination else 'current LOGIC_TREE'}")
+    print("\n" + "="*80 + "\n")
+    return ranked
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep decision tree thresholds and windows")
+    parser.add_argument('--param', action='append', required=True,
+                        help="<node id>.<threshold|window>=<a,b,c | start:stop[:step]>")
+    parser.add_argument('--random', type=int, default=0,
+                        help="sample this many random combinations instead of the full grid")
+    parser.add_argument('--seed', type=int, default=None, help="random search seed")
+    parser.add_argument('--years', type=float, default=5, help="years of history to test")
+    parser.add_argument('--cost-bps', type=float, default=0.0, help="one-way trading cost in basis points")
+    parser.add_argument('--metric', choices=RANK_METRICS, default='sharpe', help="ranking metric")
+    parser.add_argument('--top', type=int, default=10, help="combinations to show")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    params = [parse_param(text) for text in args.param]
+    if args.random:
+        combinations = list(random_combinations(params, args.random, args.seed))
+    else:
+        combinations = list(grid_combinations(params))
+
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=int(args.years * 365))
+    windows = [w for (_, field), grid, bounds in params if field == 'window'
+               for w in (range(int(bounds[0]), int(bounds[1]) + 1) if bounds else grid)]
+    warmup = main.lookback_days(max(list(main.required_rows().values()) + [w + 1 for w in windows]))
+
+    traded = {t for leaf, signal in enumerate(main.COMPILED_TREE.leaves)
+              if leaf not in main.COMPILED_TREE.ranks for t in parse_allocation(signal)}
+    tickers = sorted(set(main.required_rows()) | traded)
+    matrix = load_history(tickers, start_date - timedelta(days=warmup), end_date)
+
+    print(f"🔍 Backtesting {len(combinations)} combinations on {args.workers or os.cpu_count()} processes...")
+    started = time.perf_counter()
+    # The empty combination is the current tree, scored alongside for reference
+    (_, baseline), *results = run_sweep(matrix, params, [{}] + combinations, start_date=start_date,
+                                        cost_bps=args.cost_bps, workers=args.workers)
+    elapsed = time.perf_counter() - started
+
+    print_ranking(results, metric=args.metric, top=args.top, baseline=baseline)
+    print(f"⏱️  {len(combinations)} backtests in {elapsed:.2f} s "
+          f"({len(combinations) / elapsed:.0f} per second)")
@@ -0,0 +1,172 @@
+"""
+Trigger prices for the decision tree's RSI nodes.
+
+During a session only today's close is unknown: the other window - 1 diffs
+of every SMA-RSI are settled. With U and D the sums of the settled up and
+down moves, RSI as a function of today's close p is
+
+    RSI(p) = 100 (U + max(d, 0)) / (U + D + |d|),   d = p - last settled close
+
+which only grows with p, so each node flips at exactly one price:
+
+    d >= 0:  d = theta D / (100 - theta) - U
+    d <  0:  d = U + D - 100 U / theta
+
+A trigger table holds that price for every node. An intraday run can then
+tell whether the last decision still stands by comparing live quotes with
+the triggers of the nodes on its path, without recomputing any RSI: the
+path only changes when one of its own nodes flips.
+
+Run this file to check the flip prices against calculate_rsi_sma():
+
+    python3 triggers.py
+"""
+
+import random
+import sys
+
+import numpy as np
+
+from indicators import calculate_rsi_sma
+
+# A live price this close (relative) to a trigger counts as crossed, so
+# rounding never hides a flip
+TRIGGER_TOLERANCE = 1e-6
+
+
+def rsi_flip_price(settled, window, threshold):
+    """
+    Close at which SMA-RSI(window) over `settled` plus that close equals
+    `threshold`.
+
+    Args:
+        settled: settled closes, oldest first (at least `window` of them)
+        window: RSI window
+        threshold: RSI level
+    Returns: price, or None if the RSI cannot cross `threshold` (threshold
+             outside (0, 100) or history too short)
+    """
+    if len(settled) < window or not 0 < threshold < 100:
+        return None
+
+    diffs = np.diff(np.asarray(settled[-window:], dtype=np.float64))
+    up = diffs[diffs > 0].sum()
+    down = -diffs[diffs < 0].sum()
+
+    move = threshold * down / (100 - threshold) - up
+    if move < 0:
+        move = up + down - 100 * up / threshold
+    return float(settled[-1] + move)
+
+
+def build_trigger_table(tree, settled_closes):
+    """
+    Flip price of every node of a {node id: node} tree.
+
+    Args:
+        tree: LOGIC_TREE-style dict
+        settled_closes: function(ticker) -> settled closes (no partial bar),
+                        or None if the ticker has no usable history
+    Returns: {str(node id): {'ticker', 'operator', 'price'}}; price is
+             None for nodes that cannot be decided from the price alone
+             (non-RSI indicators, unreachable thresholds); rank nodes
+             have no single flip price and are left out
+    """
+    table = {}
+    for node_id, node in tree.items():
+        if node.get('type') == 'rank':
+            continue
+        price = None
+        if node.get('indicator', 'rsi_sma') == 'rsi_sma':
+            closes = settled_closes(node['ticker'])
+            if closes is not None:
+                price = rsi_flip_price(closes, node['window'], node['threshold'])
+        table[str(node_id)] = {
+            'ticker': node['ticker'],
+            'operator': node.get('operator', '>'),
+            'price': price,
+        }
+    return table
+
+
+def node_outcome(trigger, price):
+    """
+    A node's result at a live price: True/False, or None when the price is
+    within TRIGGER_TOLERANCE of the trigger (or there is no trigger).
+    """
+    flip = trigger['price']
+    if flip is None or price is None or abs(price - flip) <= TRIGGER_TOLERANCE * abs(flip):
+        return None
+    above = price > flip
+    return above if trigger['operator'] == '>' else not above
+
+
+def crossed_triggers(table, path, prices):
+    """
+    Nodes on `path` whose result would differ at the live prices.
+
+    Args:
+        table: build_trigger_table() result
+        path: [(node id, result)] of the last decision
+        prices: dict of ticker -> live price
+    Returns: list of node IDs that flipped or cannot be confirmed
+    """
+    crossed = []
+    for node_id, result in path:
+        trigger = table[str(node_id)]
+        if node_outcome(trigger, prices.get(trigger['ticker'])) != result:
+            crossed.append(node_id)
+    return crossed
+
+
+def test_trigger_prices(samples=20000, seed=0):
+    """
+    Randomized check of rsi_flip_price() against calculate_rsi_sma().
+
+    For random price histories, windows and thresholds, the RSI of the
+    settled closes plus a close just above the flip price (by
+    TRIGGER_TOLERANCE) must be above the threshold, and just below it must
+    not be; node_outcome() must agree with that RSI for both operators.
+
+    Returns: number of failing samples (0 when consistent)
+    """
+    print("\n" + "="*80)
+    print("UNIT TEST: Trigger Prices vs RSI Calculation")
+    print("="*80)
+
+    rng = random.Random(seed)
+    failures = 0
+    checked = 0
+    for _ in range(samples):
+        window = rng.randint(2, 60)
+        closes = [100.0]
+        for _ in range(window + rng.randint(0, 20)):
+            closes.append(closes[-1] * (1 + rng.gauss(0, 0.03)))
+        threshold = rng.uniform(1, 99)
+
+        flip = rsi_flip_price(closes, window, threshold)
+        if flip is None or flip <= 0:
+            continue  # threshold out of reach of any positive price
+        checked += 1
+
+        for side in (-1, 1):
+            price = flip * (1 + side * 2 * TRIGGER_TOLERANCE)
+            rsi = calculate_rsi_sma(closes + [price], window)
+            above = rsi > threshold
+            outcomes = (node_outcome({'price': flip, 'operator': '>'}, price),
+                        node_outcome({'price': flip, 'operator': '<'}, price))
+            if above != (side > 0) or outcomes != (above, rsi < threshold):
+                failures += 1
+                if failures <= 5:
+                    print(f"❌ window {window}, threshold {threshold:.4f}: flip {flip:.6f}, "
+                          f"price {price:.6f} gives RSI {rsi:.6f}")
+                break
+
+    print(f"Samples: {checked} with a reachable flip price, failures: {failures}")
+    print("✓ Flip prices consistent" if failures == 0 else "❌ Flip prices disagree with the RSI")
+    print("="*80 + "\n")
+    return failures
+
+
+if __name__ == "__main__":
+    sys.exit(1 if test_trigger_prices() else 0)